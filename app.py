@@ -1,5 +1,6 @@
 import os
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -17,6 +18,11 @@ def create_app():
     app.config['SESSION_PERMANENT'] = True
     app.config['PERMANENT_SESSION_LIFETIME'] = 86400 * 7  # 7 days
     
+    # Behind a load balancer the client IP (used by login throttling) comes from X-Forwarded-For
+    trusted_proxies = int(os.getenv('TRUSTED_PROXY_COUNT', 0))
+    if trusted_proxies:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+    
     # Validate MongoDB URI
     mongodb_uri = os.getenv('MONGODB_URI')
     if not mongodb_uri:
@@ -54,6 +60,9 @@ def create_app():
         from controllers.feature.report_routes import report_bp
         from controllers.feature.review_routes import review_bp
         from controllers.feature.user_routes import user_bp
+        from controllers.feature.search_routes import search_bp
+        from controllers.feature.export_routes import export_bp
+        from controllers.feature.calendar_routes import calendar_bp
         
         app.register_blueprint(main_bp)
         app.register_blueprint(auth_bp)
@@ -64,12 +73,19 @@ def create_app():
         app.register_blueprint(report_bp)
         app.register_blueprint(review_bp, url_prefix='/reviews')
         app.register_blueprint(user_bp, url_prefix='/users')
+        app.register_blueprint(search_bp)
+        app.register_blueprint(export_bp)
+        app.register_blueprint(calendar_bp)
         print("[OK] Blueprints registered successfully")
     except ImportError as e:
         print(f"[ERROR] Error loading blueprints: {e}")
         if app.config['ENV'] == 'production':
             raise
     
+    # Default Cache-Control per blueprint for GET responses
+    from utils.conditional import init_app as init_conditional
+    init_conditional(app)
+    
     return app
 
 # Create app instance for Gunicorn
@@ -1,5 +1,6 @@
 import os
 from mongoengine import connect, disconnect
+from mongoengine.connection import get_connection, ConnectionFailure
 
 _connection = None
 
@@ -13,6 +14,16 @@ class MongoDBConfig:
         'serverSelectionTimeoutMS': 5000,
         'connectTimeoutMS': 10000,
         'retryWrites': True,
+        'w': 'majority',
+    }
+    
+    # One pool per process, shared by mongoengine models and raw pymongo (db.py)
+    POOL_OPTIONS = {
+        'maxPoolSize': int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+        'minPoolSize': int(os.getenv('MONGO_MIN_POOL_SIZE', 0)),
+        'maxIdleTimeMS': int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 60000)),
+        # zlib ships with Python; snappy and zstd need python-snappy / zstandard
+        'compressors': os.getenv('MONGO_COMPRESSORS', 'zlib'),
     }
 
 def init_db(app):
@@ -42,14 +53,14 @@ def init_db(app):
             pass
         
         # Connect to MongoDB Atlas
+        options = {**MongoDBConfig.CONNECT_OPTIONS, **MongoDBConfig.POOL_OPTIONS}
+        if not options['compressors']:
+            del options['compressors']
         _connection = connect(
             db=MongoDBConfig.DATABASE_NAME,
             host=mongodb_uri,
             alias='default',
-            serverSelectionTimeoutMS=5000,
-            connectTimeoutMS=10000,
-            retryWrites=True,
-            w='majority'
+            **options
         )
         
         print(f'[OK] Connected to MongoDB Atlas')
@@ -61,6 +72,18 @@ def init_db(app):
         print(f'[ERROR] MongoDB connection error: {e}')
         raise
 
+def get_client():
+    """The process-wide MongoClient, connecting on first use outside the app"""
+    try:
+        return get_connection('default')
+    except ConnectionFailure:
+        init_db(None)
+        return get_connection('default')
+
+def get_database():
+    """DATABASE_NAME on the shared client (mongoengine prefers a database named in the URI)"""
+    return get_client()[MongoDBConfig.DATABASE_NAME]
+
 def close_db():
     """Close MongoDB connection"""
     try:
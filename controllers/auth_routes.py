@@ -1,5 +1,10 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, session
 from models.MongoUser import MongoUser
+from utils.passwords import HashingBusy
+from utils import throttle
+from utils.errors import duplicate_key_field
+from mongoengine.errors import NotUniqueError
+import math
 import uuid
 
 auth_bp = Blueprint('auth', __name__)
@@ -16,6 +21,12 @@ def login():
             if not username or not password:
                 return jsonify({'error': 'Username and password required'}), 400
             
+            # Turned away before the user lookup and the password hash;
+            # a successful login gives its IP token back below
+            retry_after = throttle.hit('login_ip', request.remote_addr) or throttle.hit('login_user', username.lower())
+            if retry_after:
+                return throttled_response(retry_after)
+            
             # Query user
             user = MongoUser.objects(username=username).first()
             
@@ -28,6 +39,9 @@ def login():
             if not user.is_active:
                 return jsonify({'error': 'Account disabled'}), 403
             
+            throttle.reset('login_user', username.lower())
+            throttle.refund('login_ip', request.remote_addr)
+            
             # Store user in session
             session['user_id'] = str(user.id)
             session['username'] = user.username
@@ -43,6 +57,8 @@ def login():
                 'redirect': '/dashboard'
             }), 200
             
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             print(f'Login error: {str(e)}')
             return jsonify({'error': 'Login failed: ' + str(e)}), 500
@@ -54,6 +70,10 @@ def signup():
     """Signup page and handler"""
     if request.method == 'POST':
         try:
+            retry_after = throttle.hit('signup_ip', request.remote_addr)
+            if retry_after:
+                return throttled_response(retry_after)
+            
             data = request.get_json()
             username = data.get('username', '').strip()
             email = data.get('email', '').strip()
@@ -73,15 +93,7 @@ def signup():
             if '@' not in email:
                 return jsonify({'error': 'Invalid email address'}), 400
             
-            # Check if username exists
-            if MongoUser.objects(username=username).first():
-                return jsonify({'error': 'Username already taken'}), 409
-            
-            # Check if email exists
-            if MongoUser.objects(email=email).first():
-                return jsonify({'error': 'Email already registered'}), 409
-            
-            # Create new user
+            # Create new user; the unique username and email indexes reject duplicates
             user = MongoUser(
                 id=str(uuid.uuid4()),
                 username=username,
@@ -90,8 +102,14 @@ def signup():
                 is_active=True
             )
             user.set_password(password)
-            user.save()
+            try:
+                user.save(force_insert=True)
+            except NotUniqueError as e:
+                if duplicate_key_field(e) == 'email':
+                    return jsonify({'error': 'Email already registered'}), 409
+                return jsonify({'error': 'Username already taken'}), 409
             
+            throttle.refund('signup_ip', request.remote_addr)
             print(f'[OK] New user registered: {username}')
             
             return jsonify({
@@ -100,6 +118,8 @@ def signup():
                 'redirect': '/login'
             }), 201
             
+        except HashingBusy:
+            return busy_response()
         except Exception as e:
             print(f'Signup error: {str(e)}')
             return jsonify({'error': 'Signup failed: ' + str(e)}), 500
@@ -111,6 +131,8 @@ def logout():
     """Logout handler"""
     if 'username' in session:
         print(f'[OK] User logged out: {session["username"]}')
+    if 'user_id' in session:
+        MongoUser.invalidate_profile(session['user_id'])
     session.clear()
     return redirect(url_for('auth.login'))
 
@@ -121,10 +143,23 @@ def profile():
         return redirect(url_for('auth.login'))
     
     try:
-        user = MongoUser.objects(id=session['user_id']).first()
-        if user:
-            return render_template('auth/profile.html', user=user.to_dict())
+        profile = MongoUser.get_profile(session['user_id'])
+        if profile:
+            return render_template('auth/profile.html', user=profile)
         return redirect(url_for('auth.login'))
     except Exception as e:
         print(f'Profile error: {e}')
         return redirect(url_for('auth.login'))
+
+# HELPER FUNCTIONS
+def throttled_response(retry_after):
+    """429 for a throttled login or signup"""
+    response = jsonify({'error': 'Too many attempts, please try again later'})
+    response.headers['Retry-After'] = str(math.ceil(retry_after))
+    return response, 429
+
+def busy_response():
+    """503 while the password hashing queue is full"""
+    response = jsonify({'error': 'Server busy, please try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
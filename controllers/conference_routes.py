@@ -1,5 +1,8 @@
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
 from models.MongoConference import MongoConference
+from utils.pagination import parse_limit
+from utils.conditional import conditional, make_etag
+from mongoengine.errors import NotUniqueError
 from datetime import datetime
 import uuid
 
@@ -18,10 +21,15 @@ def login_required(f):
 @conference_bp.route('/')
 @login_required
 def list_conferences():
-    """List all conferences"""
+    """List conferences, one page at a time"""
     try:
-        conferences = MongoConference.objects()
-        return render_template('conferences.html', conferences=conferences)
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            conferences, next_cursor = MongoConference.list_page(after=request.args.get('after'), limit=limit)
+        except ValueError as e:
+            return render_template('conferences.html', conferences=[], error=str(e)), 400
+        
+        return render_template('conferences.html', conferences=conferences, next_cursor=next_cursor, limit=limit)
     except Exception as e:
         print(f"Error listing conferences: {e}")
         return render_template('conferences.html', conferences=[])
@@ -29,13 +37,67 @@ def list_conferences():
 @conference_bp.route('/api/all', methods=['GET'])
 @login_required
 def get_all_conferences():
-    """Get all conferences as JSON"""
+    """Get conferences as JSON, paginated by ?limit=&after=<next_cursor>"""
     try:
-        conferences = MongoConference.objects()
+        try:
+            limit = parse_limit(request.args.get('limit'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        after = request.args.get('after')
+        include_total = request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        
+        # Any write bumps the newest updated_at or the count, so the page is only read when stale.
+        # Deletes leave updated_at alone, so no Last-Modified: only the ETag is trusted.
+        updated_at, total = MongoConference.collection_version()
+        etag = make_etag('conferences', updated_at, total, after, limit, include_total)
+        
+        def build():
+            try:
+                conferences, next_cursor = MongoConference.list_page(after=after, limit=limit)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            response = {
+                'success': True,
+                'data': conferences,
+                'count': len(conferences),
+                'next_cursor': next_cursor
+            }
+            # Metadata-based estimate; an exact count would cost a full collection scan
+            if include_total:
+                response['estimated_total'] = total
+            return jsonify(response), 200
+        
+        return conditional(etag, None, build)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@conference_bp.route('/api/filter', methods=['GET'])
+@login_required
+def filter_conferences():
+    """Filter conferences by field/city/country/status and date range, with facet counts"""
+    try:
+        try:
+            limit = parse_limit(request.args.get('limit'))
+            start_from = request.args.get('from')
+            start_to = request.args.get('to')
+            conferences, next_cursor, facets = MongoConference.filter_page(
+                filters={field: request.args.get(field) for field in MongoConference.FILTER_FIELDS},
+                start_from=datetime.fromisoformat(start_from) if start_from else None,
+                start_to=datetime.fromisoformat(start_to) if start_to else None,
+                after=request.args.get('after'),
+                limit=limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         return jsonify({
             'success': True,
-            'data': [conf.to_dict() for conf in conferences],
-            'count': conferences.count()
+            'data': conferences,
+            'count': len(conferences),
+            'next_cursor': next_cursor,
+            'facets': facets
         }), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -52,10 +114,6 @@ def create_conference():
         if not all(field in data for field in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        # Check if conference name already exists
-        if MongoConference.objects(name=data['name']).first():
-            return jsonify({'error': 'Conference name already exists'}), 409
-        
         # Parse dates
         try:
             start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00'))
@@ -72,7 +130,12 @@ def create_conference():
             start_date=start_date,
             end_date=end_date
         )
-        conference.save()
+        # The unique name index rejects duplicates in the same round trip
+        try:
+            conference.save(force_insert=True)
+        except NotUniqueError:
+            return jsonify({'error': 'Conference name already exists'}), 409
+        conference.cache()
         
         print(f"✓ Conference created: {data['name']}")
         
@@ -91,14 +154,15 @@ def create_conference():
 def get_conference(conference_id):
     """Get single conference"""
     try:
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
-        return jsonify({
-            'success': True,
-            'data': conference.to_dict()
-        }), 200
+        return conditional(
+            make_etag(conference.id, conference.updated_at, conference.attendee_count),
+            conference.updated_at,
+            lambda: (jsonify({'success': True, 'data': conference.to_dict()}), 200)
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -115,10 +179,6 @@ def update_conference(conference_id):
         
         # Update fields
         if 'name' in data:
-            # Check if new name already exists
-            existing = MongoConference.objects(name=data['name']).first()
-            if existing and existing.id != conference_id:
-                return jsonify({'error': 'Conference name already exists'}), 409
             conference.name = data['name']
         
         if 'description' in data:
@@ -134,7 +194,11 @@ def update_conference(conference_id):
             conference.end_date = datetime.fromisoformat(data['end_date'].replace('Z', '+00:00'))
         
         conference.updated_at = datetime.utcnow()
-        conference.save()
+        try:
+            conference.save()
+        except NotUniqueError:
+            return jsonify({'error': 'Conference name already exists'}), 409
+        MongoConference.invalidate_cache(conference_id)
         
         print(f"✓ Conference updated: {conference_id}")
         
@@ -158,6 +222,7 @@ def delete_conference(conference_id):
         
         conference_name = conference.name
         conference.delete()
+        MongoConference.invalidate_cache(conference_id)
         
         print(f"✓ Conference deleted: {conference_name}")
         
@@ -0,0 +1,93 @@
+from flask import Blueprint, Response, current_app, jsonify, session, url_for
+from itsdangerous import URLSafeSerializer, BadSignature
+from models.MongoConference import MongoConference
+from models.MongoSession import MongoSession
+from utils.icalendar import render_calendar
+from utils.conditional import conditional, make_etag
+from datetime import datetime
+
+calendar_bp = Blueprint('calendar', __name__, url_prefix='/calendar')
+
+# Calendar apps poll without a login, so agenda feeds are addressed by a signed token
+FEED_TOKEN_SALT = 'agenda-feed'
+
+# CONFERENCE SCHEDULE FEED
+@calendar_bp.route('/conference/<conference_id>.ics', methods=['GET'])
+def conference_feed(conference_id):
+    """Every session of a conference as an iCalendar feed"""
+    try:
+        conference = MongoConference.get_cached(conference_id)
+        if not conference:
+            return jsonify({'error': 'Conference not found'}), 404
+        
+        return calendar_response(
+            f'{conference.name} schedule',
+            {'conference_id': conference_id},
+            f'conference:{conference_id}:{conference.name}',
+            cache_control='public, no-cache'
+        )
+    except Exception as e:
+        print(f"Conference feed error: {str(e)}")
+        return jsonify({'error': 'Failed to build calendar'}), 500
+
+# PERSONAL AGENDA FEED
+@calendar_bp.route('/agenda/<token>.ics', methods=['GET'])
+def agenda_feed(token):
+    """The sessions a user is registered for, addressed by their feed token"""
+    try:
+        user_id = feed_serializer().loads(token)
+    except BadSignature:
+        return jsonify({'error': 'Invalid feed link'}), 404
+    
+    try:
+        return calendar_response(
+            'My conference agenda',
+            {'attendees': user_id},
+            f'agenda:{user_id}',
+            cache_control='private, no-cache'
+        )
+    except Exception as e:
+        print(f"Agenda feed error: {str(e)}")
+        return jsonify({'error': 'Failed to build calendar'}), 500
+
+# AGENDA FEED LINK
+@calendar_bp.route('/agenda-link', methods=['GET'])
+def agenda_link():
+    """Subscription URL for the current user's agenda feed"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    token = feed_serializer().dumps(session['user_id'])
+    return jsonify({
+        'success': True,
+        'url': url_for('calendar.agenda_feed', token=token, _external=True)
+    }), 200
+
+# HELPER FUNCTIONS
+def feed_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_TOKEN_SALT)
+
+def calendar_response(name, query, scope, cache_control):
+    """
+    Serve a feed, answering conditional requests before the body is built.
+    
+    The strong ETag covers the session count and latest updated_at, read with
+    one indexed aggregation; a current client gets a bodiless 304.
+    """
+    version = MongoSession.version_of(query)
+    updated_at = version['updated_at']
+    
+    def build():
+        sessions = MongoSession._get_collection().find(
+            query, {field: 1 for field in MongoSession.CALENDAR_FIELDS}
+        ).sort('start_time', 1)
+        response = Response(
+            render_calendar(name, sessions, updated_at or datetime.utcnow()),
+            mimetype='text/calendar'
+        )
+        response.headers['Content-Disposition'] = 'inline; filename="schedule.ics"'
+        return response
+    
+    response = conditional(make_etag(scope, version['count'], updated_at), updated_at, build)
+    response.headers['Cache-Control'] = cache_control
+    return response
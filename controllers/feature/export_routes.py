@@ -0,0 +1,71 @@
+from flask import Blueprint, Response, request, jsonify
+from models.MongoConference import MongoConference
+from models.MongoSession import MongoSession
+from models.MongoAttendee import MongoAttendee
+from utils.streaming import ndjson_stream, gzip_stream, guarded_stream
+import hmac
+import os
+
+export_bp = Blueprint('export', __name__, url_prefix='/export')
+
+# Bulk exports are for machine clients (BI extracts), authorized by a shared token
+EXPORT_API_TOKEN = os.getenv('EXPORT_API_TOKEN', '')
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+EXPORT_MODELS = {
+    'conferences': MongoConference,
+    'sessions': MongoSession,
+    'attendees': MongoAttendee
+}
+
+# BULK NDJSON EXPORT
+@export_bp.route('/<kind>', methods=['GET'])
+def export_collection(kind):
+    """
+    Stream a whole collection as NDJSON in _id order, gzipped when the client accepts it.
+    
+    Resume an interrupted extract with ?after=<_id of the last line received>;
+    ?limit= caps the number of documents in one response.
+    """
+    if not is_authorized():
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    model = EXPORT_MODELS.get(kind)
+    if model is None:
+        return jsonify({'error': f'Invalid export. Use one of: {", ".join(EXPORT_MODELS)}'}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 0))
+        if limit < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    
+    after = request.args.get('after')
+    match = {'_id': {'$gt': after}} if after else {}
+    
+    # Ordered by _id so the last line received is a valid resume point
+    cursor = model._get_collection().find(match, sort=[('_id', 1)], batch_size=EXPORT_BATCH_SIZE, limit=limit)
+    chunks = ndjson_stream(cursor)
+    
+    compress = 'gzip' in request.headers.get('Accept-Encoding', '')
+    if compress:
+        chunks = gzip_stream(chunks)
+    
+    response = Response(guarded_stream(chunks), mimetype='application/x-ndjson')
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    
+    print(f"[OK] Export started: {kind} after={after or '-'}")
+    
+    return response
+
+# HELPER FUNCTIONS
+def is_authorized():
+    """Bearer token check; exports are disabled while EXPORT_API_TOKEN is unset"""
+    if not EXPORT_API_TOKEN:
+        return False
+    header = request.headers.get('Authorization', '')
+    token = header[len('Bearer '):] if header.startswith('Bearer ') else ''
+    return hmac.compare_digest(token.encode(), EXPORT_API_TOKEN.encode())
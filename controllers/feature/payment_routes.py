@@ -24,7 +24,7 @@ def initiate_payment():
             return jsonify({'error': 'Invalid conference or amount'}), 400
         
         # Verify conference exists
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
@@ -166,16 +166,14 @@ def payment_page(conference_id):
         return redirect(url_for('auth.login'))
     
     try:
-        conference = Conference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
-        user = MongoUser.objects(id=session['user_id']).first()
-        
         return render_template(
             'payments/payment_page.html',
             conference=conference.to_dict(),
-            user=user.to_dict() if user else {}
+            user=MongoUser.get_profile(session['user_id']) or {}
         )
     except Exception as e:
         print(f"Error loading payment page: {str(e)}")
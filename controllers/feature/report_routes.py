@@ -1,13 +1,15 @@
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for, send_file
 from models.MongoConference import MongoConference
-from models.MongoSession import MongoSession
-from models.MongoUser import MongoUser
-from models.MongoAttendee import MongoAttendee
+from models.MongoConferenceReport import MongoConferenceReport
+from models.MongoReportJob import MongoReportJob
+from utils.streaming import csv_attachment, set_attachment
+from utils import report_jobs
+from utils.reports import (
+    conference_report_data, sessions_report_data, attendees_report_data,
+    conference_csv_rows, attendees_csv_rows
+)
 from datetime import datetime
-import io
-import csv
-import uuid
-import json
+import os
 
 report_bp = Blueprint('report', __name__, url_prefix='/reports')
 
@@ -19,7 +21,7 @@ def conference_report(conference_id):
         return redirect(url_for('auth.login'))
     
     try:
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
@@ -27,27 +29,8 @@ def conference_report(conference_id):
         if conference.organizer_id != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Get conference data
-        total_sessions = MongoSession.objects(conference_id=conference_id).count()
-        total_attendees = len(conference.attendees)
-        
-        sessions = MongoSession.objects(conference_id=conference_id)
-        
-        report_data = {
-            'conference_name': conference.name,
-            'conference_id': conference.id,
-            'description': conference.description,
-            'location': conference.location,
-            'start_date': conference.start_date.isoformat(),
-            'end_date': conference.end_date.isoformat(),
-            'total_sessions': total_sessions,
-            'total_attendees': total_attendees,
-            'max_attendees': conference.max_attendees,
-            'registration_fee': conference.registration_fee,
-            'status': conference.status,
-            'sessions': [s.to_dict() for s in sessions],
-            'generated_at': datetime.utcnow().isoformat()
-        }
+        # Materialized snapshot: one primary-key read unless missing, stale or ?refresh=1
+        report_data = conference_report_data(conference, refresh=is_refresh())
         
         report_format = request.args.get('format', 'json')
         
@@ -70,7 +53,7 @@ def attendees_report(conference_id):
         return redirect(url_for('auth.login'))
     
     try:
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
@@ -78,31 +61,13 @@ def attendees_report(conference_id):
         if conference.organizer_id != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Get attendee information
-        attendees_data = []
-        for attendee_id in conference.attendees:
-            user = MongoUser.objects(id=attendee_id).first()
-            if user:
-                attendees_data.append({
-                    'name': user.full_name,
-                    'email': user.email,
-                    'username': user.username,
-                    'joined_date': user.created_at.isoformat() if user.created_at else ''
-                })
-        
-        report = {
-            'conference_name': conference.name,
-            'total_attendees': len(attendees_data),
-            'attendees': attendees_data,
-            'generated_at': datetime.utcnow().isoformat()
-        }
-        
         report_format = request.args.get('format', 'json')
         
         if report_format == 'csv':
-            return generate_attendees_csv(report, conference.name)
-        else:
-            return jsonify(report), 200
+            # Rows are looked up and written while the response streams
+            return generate_attendees_csv(attendees_report_data(conference, lazy=True), conference.name)
+        
+        return jsonify(attendees_report_data(conference)), 200
         
     except Exception as e:
         print(f"Error generating attendee report: {str(e)}")
@@ -116,7 +81,7 @@ def sessions_report(conference_id):
         return redirect(url_for('auth.login'))
     
     try:
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
@@ -124,33 +89,37 @@ def sessions_report(conference_id):
         if conference.organizer_id != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        sessions = MongoSession.objects(conference_id=conference_id).order_by('start_time')
-        
-        sessions_data = []
-        for sess in sessions:
-            sessions_data.append({
-                'title': sess.title,
-                'speaker': sess.speaker,
-                'location': sess.location,
-                'start_time': sess.start_time.isoformat(),
-                'end_time': sess.end_time.isoformat(),
-                'registered_attendees': len(sess.attendees),
-                'capacity': sess.capacity
-            })
-        
-        report = {
-            'conference_name': conference.name,
-            'total_sessions': len(sessions_data),
-            'sessions': sessions_data,
-            'generated_at': datetime.utcnow().isoformat()
-        }
-        
-        return jsonify(report), 200
+        return jsonify(sessions_report_data(conference, refresh=is_refresh())), 200
         
     except Exception as e:
         print(f"Error generating sessions report: {str(e)}")
         return jsonify({'error': 'Failed to generate report'}), 500
 
+# REBUILD REPORT SNAPSHOT
+@report_bp.route('/conference/<conference_id>/rebuild', methods=['POST'])
+def rebuild_report(conference_id):
+    """Recompute a conference's materialized report from scratch"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        conference = MongoConference.get_cached(conference_id)
+        if not conference:
+            return jsonify({'error': 'Conference not found'}), 404
+        
+        if conference.organizer_id != session['user_id']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        MongoConferenceReport.rebuild(conference_id)
+        
+        print(f"[OK] Report snapshot rebuilt: {conference.name}")
+        
+        return jsonify({'success': True, 'message': 'Report rebuilt'}), 200
+        
+    except Exception as e:
+        print(f"Error rebuilding report: {str(e)}")
+        return jsonify({'error': 'Failed to rebuild report'}), 500
+
 # DOWNLOAD REPORT
 @report_bp.route('/download/<report_type>/<conference_id>', methods=['GET'])
 def download_report(report_type, conference_id):
@@ -159,7 +128,7 @@ def download_report(report_type, conference_id):
         return redirect(url_for('auth.login'))
     
     try:
-        conference = MongoConference.objects(id=conference_id).first()
+        conference = MongoConference.get_cached(conference_id)
         if not conference:
             return jsonify({'error': 'Conference not found'}), 404
         
@@ -170,89 +139,124 @@ def download_report(report_type, conference_id):
         
         if report_type == 'conference':
             if file_format == 'csv':
-                report_data = {
-                    'conference_name': conference.name,
-                    'total_sessions': MongoSession.objects(conference_id=conference_id).count(),
-                    'total_attendees': len(conference.attendees)
-                }
+                report_data = conference_report_data(conference)
+                report_data.pop('sessions')
                 return generate_csv_report(report_data, conference.name)
         
+        if file_format == 'pdf' and report_type in report_jobs.REPORT_TYPES:
+            # Rendered in the report pool; identical report data reuses the cached file
+            report_data = report_jobs.build_report(report_type, conference)
+            path = report_jobs.pdf_artifact(report_type, report_data)
+            if path is None:
+                response = jsonify({'success': True, 'message': 'Report is being rendered, please retry shortly'})
+                response.headers['Retry-After'] = '5'
+                return response, 202
+            
+            return set_attachment(
+                send_file(path, mimetype='application/pdf'),
+                f'{conference.name}_{report_type}_{datetime.utcnow().strftime("%Y%m%d")}.pdf'
+            )
+        
         return jsonify({'error': 'Invalid report type or format'}), 400
         
     except Exception as e:
         print(f"Error downloading report: {str(e)}")
         return jsonify({'error': 'Failed to download report'}), 500
 
-# HELPER FUNCTIONS
-def generate_csv_report(data, filename):
-    """Generate CSV report"""
+# QUEUE REPORT JOB
+@report_bp.route('/jobs', methods=['POST'])
+def create_report_job():
+    """Queue a report for background generation; poll the returned job for completion"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        data = request.get_json() or {}
+        report_type = data.get('report_type', 'conference')
+        file_format = data.get('format', 'csv')
+        
+        if report_type not in report_jobs.REPORT_TYPES:
+            return jsonify({'error': f'Invalid report type. Use one of: {", ".join(report_jobs.REPORT_TYPES)}'}), 400
+        if file_format not in report_jobs.JOB_FORMATS:
+            return jsonify({'error': f'Invalid format. Use one of: {", ".join(report_jobs.JOB_FORMATS)}'}), 400
+        
+        conference = MongoConference.get_cached(data.get('conference_id', ''))
+        if not conference:
+            return jsonify({'error': 'Conference not found'}), 404
+        
+        if conference.organizer_id != session['user_id']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        job = report_jobs.submit_report(report_type, file_format, conference, session['user_id'])
+        
+        print(f"[OK] Report job {job.status}: {job.id}")
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 200 if job.status == 'done' else 202
+        
+    except Exception as e:
+        print(f"Error queueing report job: {str(e)}")
+        return jsonify({'error': 'Failed to queue report'}), 500
+
+# REPORT JOB STATUS
+@report_bp.route('/jobs/<job_id>', methods=['GET'])
+def report_job_status(job_id):
+    """Poll a report job"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(['Conference Report'])
-        writer.writerow(['Generated at', datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')])
-        writer.writerow([])
-        
-        # Write conference details
-        writer.writerow(['Conference Name', data.get('conference_name', '')])
-        writer.writerow(['Total Sessions', data.get('total_sessions', 0)])
-        writer.writerow(['Total Attendees', data.get('total_attendees', 0)])
-        writer.writerow([])
-        
-        # Write sessions if available
-        if 'sessions' in data:
-            writer.writerow(['Sessions'])
-            writer.writerow(['Title', 'Speaker', 'Location', 'Start Time', 'End Time'])
-            for session in data['sessions']:
-                writer.writerow([
-                    session.get('title', ''),
-                    session.get('speaker', ''),
-                    session.get('location', ''),
-                    session.get('start_time', ''),
-                    session.get('end_time', '')
-                ])
-        
-        # Create response
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'{filename}_report_{datetime.utcnow().strftime("%Y%m%d")}.csv'
-        )
+        job = MongoReportJob.objects(id=job_id).first()
+        if not job or job.requested_by != session['user_id']:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        report_jobs.recover(job)
+        
+        return jsonify({'success': True, 'job': job.to_dict()}), 200
+        
     except Exception as e:
-        print(f"CSV generation error: {str(e)}")
-        return jsonify({'error': 'Failed to generate CSV'}), 500
+        print(f"Error fetching report job: {str(e)}")
+        return jsonify({'error': 'Failed to fetch report job'}), 500
 
-def generate_attendees_csv(report, filename):
-    """Generate attendees CSV"""
+# DOWNLOAD REPORT JOB RESULT
+@report_bp.route('/jobs/<job_id>/download', methods=['GET'])
+def download_report_job(job_id):
+    """Download the artifact of a finished report job"""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
     try:
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        writer.writerow(['Attendees Report'])
-        writer.writerow(['Conference', report.get('conference_name', '')])
-        writer.writerow(['Total Attendees', report.get('total_attendees', 0)])
-        writer.writerow([])
-        writer.writerow(['Name', 'Email', 'Username', 'Joined Date'])
-        
-        for attendee in report.get('attendees', []):
-            writer.writerow([
-                attendee.get('name', ''),
-                attendee.get('email', ''),
-                attendee.get('username', ''),
-                attendee.get('joined_date', '')
-            ])
-        
-        output.seek(0)
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'{filename}_attendees_{datetime.utcnow().strftime("%Y%m%d")}.csv'
-        )
+        job = MongoReportJob.objects(id=job_id).first()
+        if not job or job.requested_by != session['user_id']:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        if job.status != 'done':
+            return jsonify({'error': 'Report not ready', 'job': job.to_dict()}), 409
+        
+        path = report_jobs.artifact_path(job.content_key, job.format)
+        if not os.path.exists(path):
+            return jsonify({'error': 'Report expired, please request it again'}), 410
+        
+        return set_attachment(send_file(path, mimetype=report_jobs.MIMETYPES[job.format]), job.download_name)
+        
     except Exception as e:
-        print(f"Attendees CSV generation error: {str(e)}")
-        return jsonify({'error': 'Failed to generate CSV'}), 500
+        print(f"Error downloading report job: {str(e)}")
+        return jsonify({'error': 'Failed to download report'}), 500
+
+# HELPER FUNCTIONS
+def is_refresh():
+    """True when the caller asked for a freshly rebuilt snapshot (?refresh=1)"""
+    return request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+
+def generate_csv_report(data, filename):
+    """Stream CSV report"""
+    return csv_attachment(
+        conference_csv_rows(data),
+        f'{filename}_report_{datetime.utcnow().strftime("%Y%m%d")}.csv'
+    )
+
+def generate_attendees_csv(report, filename):
+    """Stream attendees CSV; report['attendees'] may be a generator"""
+    return csv_attachment(
+        attendees_csv_rows(report),
+        f'{filename}_attendees_{datetime.utcnow().strftime("%Y%m%d")}.csv'
+    )
@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify, session
+from models.MongoConference import MongoConference
+from models.MongoSession import MongoSession
+from utils.pagination import parse_limit, parse_page
+from datetime import datetime
+
+search_bp = Blueprint('search', __name__, url_prefix='/search')
+
+SEARCH_TYPES = ('all', 'conferences', 'sessions')
+
+# SEARCH CONFERENCES AND SESSIONS
+@search_bp.route('/', methods=['GET'])
+def search():
+    """Full-text search over conferences and sessions, ranked by relevance"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        text = request.args.get('q', '').strip()
+        if not text:
+            return jsonify({'error': 'Search query required'}), 400
+        
+        search_type = request.args.get('type', 'all')
+        if search_type not in SEARCH_TYPES:
+            return jsonify({'error': f'Invalid type. Use one of: {", ".join(SEARCH_TYPES)}'}), 400
+        
+        try:
+            page = parse_page(request.args.get('page'))
+            limit = parse_limit(request.args.get('limit'), default=20, maximum=50)
+            start_from = request.args.get('from')
+            start_to = request.args.get('to')
+            conference_filters = {
+                'status': request.args.get('status'),
+                'field': request.args.get('field'),
+                'city': request.args.get('city'),
+                'country': request.args.get('country'),
+                'start_from': datetime.fromisoformat(start_from) if start_from else None,
+                'start_to': datetime.fromisoformat(start_to) if start_to else None
+            }
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        session_filters = {
+            'conference_id': request.args.get('conference_id'),
+            'location': request.args.get('location')
+        }
+        
+        response = {'success': True, 'query': text, 'page': page, 'limit': limit}
+        
+        if search_type in ('all', 'conferences'):
+            rows, has_more = MongoConference.search(text, conference_filters, page=page, limit=limit)
+            response['conferences'] = {'data': rows, 'count': len(rows), 'has_more': has_more}
+        
+        if search_type in ('all', 'sessions'):
+            rows, has_more = MongoSession.search(text, session_filters, page=page, limit=limit)
+            response['sessions'] = {'data': rows, 'count': len(rows), 'has_more': has_more}
+        
+        return jsonify(response), 200
+    
+    except Exception as e:
+        print(f"Search error: {str(e)}")
+        return jsonify({'error': 'Search failed'}), 500
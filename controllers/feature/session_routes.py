@@ -1,11 +1,21 @@
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
 from models.MongoSession import MongoSession
 from models.MongoConference import MongoConference
-from datetime import datetime
+from models.MongoWaitlistEntry import MongoWaitlistEntry
+from models.MongoConferenceReport import MongoConferenceReport
+from utils.waitlist_sweeper import schedule_promotion
+from utils.bulk_import import detect_format, iter_records, insert_batch, validation_message, ImportFormatError
+from utils import room_schedule
+from utils.conditional import conditional, make_etag
+from mongoengine.errors import ValidationError
+from datetime import datetime, timezone
 import uuid
 
 session_bp = Blueprint('session', __name__, url_prefix='/sessions')
 
+# Schedules are validated as a whole before anything is written
+MAX_SCHEDULE_ROWS = 5000
+
 # CREATE SESSION
 @session_bp.route('/create', methods=['GET', 'POST'])
 def create_session():
@@ -23,7 +33,7 @@ def create_session():
                 return jsonify({'error': 'Missing required fields'}), 400
             
             # Verify conference exists
-            conference = MongoConference.objects(id=data['conference_id']).first()
+            conference = MongoConference.get_cached(data['conference_id'])
             if not conference:
                 return jsonify({'error': 'Conference not found'}), 404
             
@@ -43,7 +53,17 @@ def create_session():
                 capacity=int(data.get('capacity', 50)),
                 conference_id=data['conference_id']
             )
-            new_session.save()
+            
+            with room_schedule.booking(new_session.conference_id, new_session.location):
+                conflicts = room_schedule.find_conflicts(
+                    new_session.conference_id, new_session.location, new_session.start_time, new_session.end_time
+                )
+                if conflicts:
+                    return room_conflict_response(conflicts)
+                
+                new_session.save()
+                room_schedule.session_saved(new_session)
+            MongoConferenceReport.session_added(new_session)
             
             print(f"[OK] Session created: {data['title']}")
             
@@ -60,32 +80,190 @@ def create_session():
     
     return render_template('sessions/create_session.html')
 
+# IMPORT SESSION SCHEDULE
+@session_bp.route('/import/<conference_id>', methods=['POST'])
+def import_schedule(conference_id):
+    """
+    Create a conference's sessions from a CSV or iCalendar (.ics) upload.
+    
+    Every row is validated first and nothing is written if any row is invalid;
+    ?dry_run=1 only reports. Valid schedules are written with one insert_many.
+    """
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        # Authorized once for the whole schedule
+        conference = MongoConference.get_cached(conference_id)
+        if not conference:
+            return jsonify({'error': 'Conference not found'}), 404
+        
+        if conference.organizer_id != session['user_id']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        upload = request.files.get('file')
+        if upload:
+            fmt = detect_format(upload.filename, upload.mimetype)
+            stream = upload.stream
+        else:
+            fmt = detect_format(mimetype=request.mimetype)
+            stream = request.stream
+        
+        if fmt not in ('csv', 'ics'):
+            return jsonify({'error': 'Unsupported format. Upload CSV or iCalendar (.ics)'}), 400
+        
+        dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+        
+        rows, sessions_to_create, errors = [], [], []
+        # Freshly loaded room indexes, so rows are checked against every worker's
+        # bookings and against each other
+        schedules = {}
+        try:
+            for row, data in enumerate(iter_records(stream, fmt), start=1):
+                if row > MAX_SCHEDULE_ROWS:
+                    return jsonify({'error': f'Schedules are limited to {MAX_SCHEDULE_ROWS} sessions per import'}), 400
+                try:
+                    new_session = build_session(data, conference_id)
+                except (ValueError, ValidationError) as e:
+                    errors.append({'row': row, 'error': validation_message(e)})
+                    continue
+                
+                schedule = schedules.get(new_session.location)
+                if schedule is None:
+                    schedule = room_schedule.schedule_for(conference_id, new_session.location, fresh=True).copy()
+                    schedules[new_session.location] = schedule
+                conflicts = schedule.conflicts(new_session.start_time, new_session.end_time, new_session.id)
+                if conflicts:
+                    errors.append({
+                        'row': row,
+                        'error': f'Room {new_session.location} is already booked at this time',
+                        'conflicts': room_schedule.serialize_conflicts(conflicts)
+                    })
+                    continue
+                schedule.add(room_schedule.entry_for(new_session))
+                
+                rows.append(row)
+                sessions_to_create.append(new_session)
+        except (ImportFormatError, UnicodeDecodeError) as e:
+            return jsonify({'error': f'Invalid upload: {e}'}), 400
+        
+        summary = {
+            'total': len(rows) + len(errors),
+            'valid': len(rows),
+            'invalid': len(errors)
+        }
+        
+        if dry_run or errors:
+            return jsonify({
+                'success': not errors,
+                'dry_run': dry_run,
+                'summary': summary,
+                'errors': errors
+            }), 200 if not errors else 400
+        
+        # One round trip for the whole schedule; re-imported calendar events hit the _id index
+        failures = insert_batch(
+            MongoSession._get_collection(),
+            [new_session.to_mongo().to_dict() for new_session in sessions_to_create]
+        )
+        created = [new_session.id for index, new_session in enumerate(sessions_to_create) if index not in failures]
+        skipped = [
+            {
+                'row': rows[index],
+                'status': status,
+                'error': 'Session already imported' if status == 'duplicate' else message
+            }
+            for index, (status, message) in sorted(failures.items())
+        ]
+        
+        if created:
+            MongoConferenceReport.rebuild(conference_id)
+            for location in schedules:
+                room_schedule.invalidate(conference_id, location)
+        
+        print(f"[OK] Schedule imported for {conference.name}: {len(created)} sessions")
+        
+        return jsonify({
+            'success': True,
+            'dry_run': False,
+            'summary': {**summary, 'created': len(created), 'skipped': len(skipped)},
+            'session_ids': created,
+            'skipped': skipped
+        }), 200 if not created else 201
+        
+    except Exception as e:
+        print(f"Schedule import error: {str(e)}")
+        return jsonify({'error': 'Failed to import schedule'}), 500
+
 # LIST SESSIONS FOR CONFERENCE
 @session_bp.route('/conference/<conference_id>', methods=['GET'])
 def list_sessions(conference_id):
     """List all sessions for a conference"""
     try:
-        sessions = MongoSession.objects(conference_id=conference_id).order_by('start_time')
-        session_list = [s.to_dict() for s in sessions]
+        wants_json = request.headers.get('Accept') == 'application/json'
+        version = MongoSession.version_of({'conference_id': conference_id})
+        etag = make_etag(conference_id, 'json' if wants_json else 'html', version['count'], version['updated_at'])
         
-        if request.headers.get('Accept') == 'application/json':
-            return jsonify({'sessions': session_list}), 200
+        def build():
+            sessions = MongoSession.objects(conference_id=conference_id).exclude('attendees').order_by('start_time')
+            session_list = [s.to_dict(include_attendees=False) for s in sessions]
+            
+            if wants_json:
+                return jsonify({'sessions': session_list}), 200
+            
+            return render_template('sessions/list_sessions.html', sessions=session_list, conference_id=conference_id), 200
         
-        return render_template('sessions/list_sessions.html', sessions=session_list, conference_id=conference_id)
+        # Deleted sessions only show in the count, so only the ETag is trusted
+        return conditional(etag, None, build, vary='Accept')
     except Exception as e:
         print(f"Error listing sessions: {str(e)}")
         return jsonify({'error': 'Failed to fetch sessions'}), 500
 
+# PERSONAL AGENDA
+@session_bp.route('/agenda', methods=['GET'])
+def agenda():
+    """Sessions the current user is registered for, in time order, with clashes marked"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        docs = MongoSession.agenda(session['user_id'], request.args.get('conference_id'))
+        intervals = room_schedule.IntervalIndex(room_schedule.entry_for(doc) for doc in docs)
+        
+        sessions = []
+        for doc in docs:
+            row = MongoSession.summary_from_son(doc)
+            row['clashes_with'] = [
+                entry['id'] for entry in intervals.conflicts(doc['start_time'], doc['end_time'], exclude_id=doc['_id'])
+            ]
+            sessions.append(row)
+        
+        return jsonify({
+            'success': True,
+            'sessions': sessions,
+            'clash_count': sum(1 for row in sessions if row['clashes_with'])
+        }), 200
+    
+    except Exception as e:
+        print(f"Error fetching agenda: {str(e)}")
+        return jsonify({'error': 'Failed to fetch agenda'}), 500
+
 # VIEW SESSION DETAILS
 @session_bp.route('/<session_id>', methods=['GET'])
 def view_session(session_id):
     """View session details"""
     try:
-        sess = MongoSession.objects(id=session_id).first()
-        if not sess:
+        version = MongoSession.session_version(session_id)
+        if not version:
             return jsonify({'error': 'Session not found'}), 404
         
-        return render_template('sessions/view_session.html', session=sess.to_dict())
+        def build():
+            sess = MongoSession.objects(id=session_id).first()
+            if not sess:
+                return jsonify({'error': 'Session not found'}), 404
+            return render_template('sessions/view_session.html', session=sess.to_dict()), 200
+        
+        return conditional(make_etag(session_id, version.get('updated_at')), None, build)
     except Exception as e:
         print(f"Error viewing session: {str(e)}")
         return jsonify({'error': 'Failed to fetch session'}), 500
@@ -103,12 +281,14 @@ def edit_session(session_id):
             return jsonify({'error': 'Session not found'}), 404
         
         # Verify authorization
-        conference = MongoConference.objects(id=sess.conference_id).first()
+        conference = MongoConference.get_cached(sess.conference_id)
         if not conference or conference.organizer_id != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
         if request.method == 'POST':
             data = request.get_json()
+            previous_capacity = sess.capacity
+            previous_location = sess.location
             
             sess.title = data.get('title', sess.title)
             sess.description = data.get('description', sess.description)
@@ -117,8 +297,22 @@ def edit_session(session_id):
             sess.capacity = int(data.get('capacity', sess.capacity))
             sess.start_time = datetime.fromisoformat(data['start_time'])
             sess.end_time = datetime.fromisoformat(data['end_time'])
-            sess.updated_at = datetime.utcnow()
-            sess.save()
+            
+            with room_schedule.booking(sess.conference_id, sess.location):
+                conflicts = room_schedule.find_conflicts(
+                    sess.conference_id, sess.location, sess.start_time, sess.end_time, exclude_id=sess.id
+                )
+                if conflicts:
+                    return room_conflict_response(conflicts)
+                
+                sess.updated_at = datetime.utcnow()
+                sess.save()
+                room_schedule.session_saved(sess, previous_location)
+            MongoConferenceReport.session_updated(sess, previous_capacity)
+            
+            # Extra seats go to the waitlist first, filled in the background
+            if sess.capacity > previous_capacity and sess.waitlist_count > 0:
+                schedule_promotion(session_id)
             
             print(f"[OK] Session updated: {sess.title}")
             
@@ -143,12 +337,15 @@ def delete_session(session_id):
             return jsonify({'error': 'Session not found'}), 404
         
         # Verify authorization
-        conference = MongoConference.objects(id=sess.conference_id).first()
+        conference = MongoConference.get_cached(sess.conference_id)
         if not conference or conference.organizer_id != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
         session_title = sess.title
         sess.delete()
+        room_schedule.session_removed(sess.conference_id, sess.location, sess.id)
+        MongoConferenceReport.session_removed(sess)
+        MongoWaitlistEntry.objects(session_id=session_id).delete()
         
         print(f"[OK] Session deleted: {session_title}")
         
@@ -166,26 +363,59 @@ def register_session(session_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        sess = MongoSession.objects(id=session_id).first()
-        if not sess:
+        # Clashing sessions are rejected unless the user accepts them with allow_clash
+        data = request.get_json(silent=True) or {}
+        allow_clash = data.get('allow_clash') or request.args.get('allow_clash', '').lower() in ('1', 'true', 'yes')
+        
+        clashes = MongoSession.agenda_clashes(session['user_id'], session_id)
+        if clashes is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        user_id = session['user_id']
+        if clashes and not allow_clash:
+            return jsonify({
+                'error': 'Session clashes with your agenda',
+                'clashes': room_schedule.serialize_conflicts(clashes)
+            }), 409
+        
+        outcome, sess = MongoSession.reserve_seat(session_id, session['user_id'])
         
-        # Check if already registered
-        if user_id in sess.attendees:
-            return jsonify({'error': 'Already registered for this session'}), 409
+        if outcome == MongoSession.NOT_FOUND:
+            return jsonify({'error': 'Session not found'}), 404
         
-        # Check if session is full
-        if len(sess.attendees) >= sess.capacity:
-            return jsonify({'error': 'Session is full'}), 400
+        if outcome == MongoSession.ALREADY_REGISTERED:
+            return jsonify({'error': 'Already registered for this session'}), 409
         
-        sess.attendees.append(user_id)
-        sess.save()
+        if outcome == MongoSession.FULL:
+            # Queue the user instead of turning them away to retry
+            queued, position = MongoWaitlistEntry.enqueue(session_id, session['user_id'])
+            if queued == MongoWaitlistEntry.NOT_FOUND:
+                return jsonify({'error': 'Session not found'}), 404
+            if queued == MongoWaitlistEntry.PROMOTED:
+                # Seats were free behind the queue and promotion reached this user
+                seats = MongoSession._get_collection().find_one({'_id': session_id}, MongoSession._SEAT_FIELDS)
+                return jsonify({
+                    'success': True,
+                    'message': 'Registered for session',
+                    'seats_left': MongoSession.seats_left(seats) if seats else 0,
+                    'clashes': room_schedule.serialize_conflicts(clashes)
+                }), 200
+            return jsonify({
+                'success': True,
+                'message': 'Session is full; added to waitlist',
+                'waitlisted': True,
+                'position': position,
+                'seats_left': 0,
+                'clashes': room_schedule.serialize_conflicts(clashes)
+            }), 202
         
-        print(f"[OK] User registered for session: {sess.title}")
+        print(f"[OK] User registered for session: {sess['title']}")
         
-        return jsonify({'success': True, 'message': 'Registered for session'}), 200
+        return jsonify({
+            'success': True,
+            'message': 'Registered for session',
+            'seats_left': MongoSession.seats_left(sess),
+            'clashes': room_schedule.serialize_conflicts(clashes)
+        }), 200
     
     except Exception as e:
         print(f"Error registering: {str(e)}")
@@ -199,22 +429,114 @@ def unregister_session(session_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     try:
-        sess = MongoSession.objects(id=session_id).first()
-        if not sess:
-            return jsonify({'error': 'Session not found'}), 404
+        outcome, sess = MongoSession.release_seat(session_id, session['user_id'])
         
-        user_id = session['user_id']
+        if outcome == MongoSession.NOT_FOUND:
+            return jsonify({'error': 'Session not found'}), 404
         
-        if user_id not in sess.attendees:
+        if outcome == MongoSession.NOT_REGISTERED:
             return jsonify({'error': 'Not registered for this session'}), 400
         
-        sess.attendees.remove(user_id)
-        sess.save()
+        print(f"[OK] User unregistered from session: {sess['title']}")
         
-        print(f"[OK] User unregistered from session: {sess.title}")
+        # Hand the freed seat straight to the head of the waitlist
+        seats_left = MongoSession.seats_left(sess)
+        if sess.get('waitlist_count', 0) > 0:
+            seats_left -= len(MongoWaitlistEntry.promote(session_id, limit=1))
         
-        return jsonify({'success': True, 'message': 'Unregistered from session'}), 200
+        return jsonify({
+            'success': True,
+            'message': 'Unregistered from session',
+            'seats_left': seats_left
+        }), 200
     
     except Exception as e:
         print(f"Error unregistering: {str(e)}")
         return jsonify({'error': 'Failed to unregister'}), 500
+
+# WAITLIST POSITION
+@session_bp.route('/<session_id>/waitlist', methods=['GET'])
+def waitlist_position(session_id):
+    """Current user's position on a session waitlist"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        position = MongoWaitlistEntry.position(session_id, session['user_id'])
+        if position is None:
+            return jsonify({'error': 'Not on the waitlist for this session'}), 404
+        
+        return jsonify({'success': True, 'position': position}), 200
+    
+    except Exception as e:
+        print(f"Error fetching waitlist position: {str(e)}")
+        return jsonify({'error': 'Failed to fetch waitlist position'}), 500
+
+# LEAVE WAITLIST
+@session_bp.route('/<session_id>/waitlist/leave', methods=['POST'])
+def leave_waitlist(session_id):
+    """Remove current user from a session waitlist"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    try:
+        if not MongoWaitlistEntry.leave(session_id, session['user_id']):
+            return jsonify({'error': 'Not on the waitlist for this session'}), 400
+        
+        return jsonify({'success': True, 'message': 'Left waitlist'}), 200
+    
+    except Exception as e:
+        print(f"Error leaving waitlist: {str(e)}")
+        return jsonify({'error': 'Failed to leave waitlist'}), 500
+
+# HELPER FUNCTIONS
+def room_conflict_response(conflicts):
+    """409 listing the sessions already booked into the room"""
+    return jsonify({
+        'error': f"Room {conflicts[0]['location']} is already booked at this time",
+        'conflicts': room_schedule.serialize_conflicts(conflicts)
+    }), 409
+
+def build_session(data, conference_id):
+    """Validated MongoSession from an imported CSV row or calendar event"""
+    if data.get('error'):
+        raise ValueError(data['error'])
+    
+    start_time = data.get('start_time')
+    end_time = data.get('end_time')
+    if isinstance(start_time, str) and start_time:
+        start_time = datetime.fromisoformat(start_time)
+    if isinstance(end_time, str) and end_time:
+        end_time = datetime.fromisoformat(end_time)
+    
+    # Stored times are naive UTC; rows may mix offset-aware and naive values
+    if start_time and start_time.tzinfo is not None:
+        start_time = start_time.astimezone(timezone.utc).replace(tzinfo=None)
+    if end_time and end_time.tzinfo is not None:
+        end_time = end_time.astimezone(timezone.utc).replace(tzinfo=None)
+    if start_time and end_time and end_time <= start_time:
+        raise ValueError('end_time must be after start_time')
+    
+    capacity = data.get('capacity') or 50
+    try:
+        capacity = int(capacity)
+    except (TypeError, ValueError):
+        raise ValueError(f'Invalid capacity: {capacity}')
+    
+    # Calendar UIDs give stable ids, so importing the same calendar twice is harmless
+    uid = data.get('uid')
+    session_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f'{conference_id}/{uid}')) if uid else str(uuid.uuid4())
+    
+    new_session = MongoSession(
+        id=session_id,
+        title=data.get('title') or None,
+        description=data.get('description') or '',
+        speaker=data.get('speaker') or None,
+        start_time=start_time or None,
+        end_time=end_time or None,
+        location=data.get('location') or None,
+        capacity=capacity,
+        conference_id=conference_id
+    )
+    new_session.validate()
+    return new_session
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password
 from models.user import User
 from db import db
 
@@ -14,7 +14,7 @@ def register():
         if existing_user:
             flash("Email already registered!")
             return redirect(url_for('user.register'))
-        password_hash = generate_password_hash(request.form['password'])
+        password_hash = hash_password(request.form['password'])
         user_id = db.users.insert_one({
             "email": request.form['email'],
             "password": password_hash,
@@ -28,7 +28,7 @@ def register():
 def login():
     if request.method == 'POST':
         user_data = db.users.find_one({"email": request.form['email']})
-        if user_data and check_password_hash(user_data['password'], request.form['password']):
+        if user_data and verify_password(user_data['password'], request.form['password']):
             user = User(user_data)
             login_user(user)
             return redirect(url_for('user.dashboard'))
@@ -4,6 +4,14 @@ from datetime import datetime
 from models.MongoConference import MongoConference
 from models.MongoSession import MongoSession
 from models.MongoAttendee import MongoAttendee
+from models.MongoConferenceReport import MongoConferenceReport
+from utils.cache import cache_stats
+from utils import room_schedule
+from utils.bulk_import import (
+    detect_format, iter_records, insert_batch, validation_message, ImportFormatError, IMPORT_BATCH_SIZE
+)
+from mongoengine.errors import ValidationError, NotUniqueError
+import os
 import uuid
 
 main_bp = Blueprint('main', __name__)
@@ -72,6 +80,7 @@ def create_conference():
         )
         
         conference.save()
+        conference.cache()
         
         return jsonify({
             'success': True,
@@ -109,7 +118,20 @@ def create_session():
             conference_id=data.get('conference_id', 'general')
         )
         
-        session_obj.save()
+        with room_schedule.booking(session_obj.conference_id, session_obj.location):
+            conflicts = room_schedule.find_conflicts(
+                session_obj.conference_id, session_obj.location, start_time, end_time
+            )
+            if conflicts:
+                return jsonify({
+                    'success': False,
+                    'error': f"Room {session_obj.location} is already booked at this time",
+                    'conflicts': room_schedule.serialize_conflicts(conflicts)
+                }), 409
+            
+            session_obj.save()
+            room_schedule.session_saved(session_obj)
+        MongoConferenceReport.session_added(session_obj)
         
         return jsonify({
             'success': True,
@@ -130,15 +152,7 @@ def register_attendee():
     try:
         data = request.get_json()
         
-        # Check if attendee already exists
-        existing = MongoAttendee.objects(email=data.get('email')).first()
-        if existing:
-            return jsonify({
-                'success': False,
-                'error': 'Attendee with this email already registered'
-            }), 400
-        
-        # Create new attendee
+        # Create new attendee; the unique email index rejects duplicates
         attendee = MongoAttendee(
             id=str(uuid.uuid4()),
             name=data.get('full_name'),
@@ -147,7 +161,13 @@ def register_attendee():
             company=data.get('company')
         )
         
-        attendee.save()
+        try:
+            attendee.save(force_insert=True)
+        except NotUniqueError:
+            return jsonify({
+                'success': False,
+                'error': 'Attendee with this email already registered'
+            }), 400
         
         return jsonify({
             'success': True,
@@ -161,6 +181,103 @@ def register_attendee():
             'error': str(e)
         }), 400
 
+@main_bp.route('/api/import-attendees', methods=['POST'])
+@login_required
+def import_attendees():
+    """
+    Bulk-register attendees from a CSV, NDJSON or JSON array upload.
+    
+    Send the file as multipart field 'file' or as the raw request body. Rows are
+    validated and inserted in batches; existing emails are reported as duplicates.
+    """
+    upload = request.files.get('file')
+    if upload:
+        fmt = detect_format(upload.filename, upload.mimetype)
+        stream = upload.stream
+    else:
+        fmt = detect_format(mimetype=request.mimetype)
+        stream = request.stream
+    
+    if not fmt:
+        return jsonify({
+            'success': False,
+            'error': 'Unsupported format. Upload CSV, JSON or NDJSON'
+        }), 400
+    
+    collection = MongoAttendee._get_collection()
+    results = []
+    summary = {'total': 0, 'inserted': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+    pending_rows, pending_docs = [], []
+    
+    def record(row, status, **extra):
+        summary['total'] += 1
+        summary[status] += 1
+        results.append({'row': row, 'status': status, **extra})
+    
+    def flush():
+        # One round trip per batch; the unique email index catches duplicates
+        errors = insert_batch(collection, pending_docs)
+        for index, (row, doc) in enumerate(zip(pending_rows, pending_docs)):
+            if index not in errors:
+                record(row, 'inserted', attendee_id=doc['_id'])
+            elif errors[index][0] == 'duplicate':
+                record(row, 'duplicate', error='Attendee with this email already registered')
+            else:
+                record(row, 'failed', error=errors[index][1])
+        pending_rows.clear()
+        pending_docs.clear()
+    
+    try:
+        try:
+            for row, data in enumerate(iter_records(stream, fmt), start=1):
+                try:
+                    if not isinstance(data, dict):
+                        raise ValidationError('Row must be an object')
+                    attendee = MongoAttendee(
+                        id=str(uuid.uuid4()),
+                        name=data.get('full_name') or data.get('name'),
+                        email=data.get('email'),
+                        phone=data.get('phone') or None,
+                        company=data.get('company') or None
+                    )
+                    attendee.validate()
+                except ValidationError as e:
+                    record(row, 'invalid', error=validation_message(e))
+                    continue
+                
+                pending_rows.append(row)
+                pending_docs.append(attendee.to_mongo().to_dict())
+                if len(pending_docs) >= IMPORT_BATCH_SIZE:
+                    flush()
+        finally:
+            # Rows parsed before a malformed record are still imported
+            flush()
+            results.sort(key=lambda result: result['row'])
+        
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'{e} (after row {summary["total"]})',
+            'summary': summary,
+            'rows': results
+        }), 400
+    except Exception as e:
+        print(f"Attendee import error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': 'Import failed',
+            'summary': summary,
+            'rows': results
+        }), 500
+    
+    print(f"[OK] Attendees imported: {summary['inserted']} of {summary['total']}")
+    
+    return jsonify({
+        'success': True,
+        'summary': summary,
+        'rows': results
+    }), 200
+
 @main_bp.route('/health')
 def health():
     """Health check endpoint"""
@@ -168,3 +285,11 @@ def health():
         'status': 'healthy',
         'message': 'Application is running'
     }), 200
+
+@main_bp.route('/metrics')
+def metrics():
+    """Per-worker runtime counters"""
+    return jsonify({
+        'pid': os.getpid(),
+        'caches': cache_stats()
+    }), 200
@@ -1,11 +1,24 @@
-import os
+"""
+Raw pymongo access for the blueprints that do not use mongoengine models
+
+`db` resolves to the database on the mongoengine client created by
+config.database.init_db, so both layers share one connection pool per process.
+"""
 from dotenv import load_dotenv
-from pymongo import MongoClient
 
 load_dotenv()
 
-mongodb_uri = os.getenv('MONGODB_URI')
-database_name = os.getenv('DATABASE_NAME', 'conference_db')
+from config.database import get_database
+
+
+class _SharedDatabase:
+    """Looks up the shared database on each use, so importing this module never connects"""
+
+    def __getattr__(self, name):
+        return getattr(get_database(), name)
+
+    def __getitem__(self, name):
+        return get_database()[name]
+
 
-client = MongoClient(mongodb_uri)
-db = client[database_name]  # Use explicit database name
+db = _SharedDatabase()
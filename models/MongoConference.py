@@ -1,7 +1,17 @@
 from mongoengine import Document, StringField, FloatField, DateTimeField, BooleanField, IntField, ListField
 from datetime import datetime
+from utils.cache import TTLCache
+from utils.pagination import decode_cursor, encode_cursor, keyset_match
+import os
 import uuid
 
+# Conference records by id, shared by the read and organizer-authorization paths
+_conference_cache = TTLCache(
+    'conference',
+    maxsize=int(os.getenv('CONFERENCE_CACHE_SIZE', 1024)),
+    ttl=float(os.getenv('CONFERENCE_CACHE_TTL', 30))
+)
+
 class MongoConference(Document):
     """MongoDB Conference Model"""
     
@@ -22,15 +32,207 @@ class MongoConference(Document):
     banner = StringField()  # URL to banner image
     website = StringField()
     attendees = ListField(StringField(), default=[])
+    attendee_count = IntField(default=0)  # Size of attendees; set by scripts/backfill_attendee_counts.py
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
     
     meta = {
         'collection': 'conferences',
         'db_alias': 'default',
-        'indexes': ['name', 'start_date', 'organizer_id', 'status']
+        'indexes': [
+            'name', 'start_date', 'organizer_id', 'status', 'updated_at', ('start_date', 'id'),
+            # Faceted filter shapes: equality fields first, start_date range last
+            ('status', 'start_date'),
+            ('field', 'status', 'start_date'),
+            ('country', 'city', 'start_date'),
+            ('city', 'start_date'),
+            ('country', 'status', 'start_date'),
+            {
+                'fields': ['$name', '$description', '$field', '$city'],
+                'default_language': 'english',
+                'weights': {'name': 10, 'field': 5, 'city': 3, 'description': 1},
+                'name': 'conference_text'
+            }
+        ]
     }
     
+    # Fields returned by the listing endpoints (description and attendee ids stay server-side)
+    LIST_FIELDS = (
+        'name', 'field', 'start_date', 'end_date', 'location', 'city', 'country',
+        'max_attendees', 'registration_fee', 'status', 'organizer_id',
+        'logo', 'banner', 'website', 'attendee_count', 'created_at'
+    )
+    
+    @classmethod
+    def list_page(cls, after=None, limit=50):
+        """Return one page ordered by (start_date, id) and the cursor for the next page"""
+        query = {}
+        if after:
+            start_date, last_id = decode_cursor(after)
+            try:
+                start_date = datetime.fromisoformat(start_date)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+            query = keyset_match('start_date', start_date, last_id)
+        
+        projection = {field: 1 for field in cls.LIST_FIELDS}
+        cursor = cls._get_collection().find(query, projection)
+        docs = list(cursor.sort([('start_date', 1), ('_id', 1)]).limit(limit + 1))
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]['start_date'], docs[-1]['_id'])
+        return [cls.summary_from_son(doc) for doc in docs], next_cursor
+    
+    # Filterable fields that also get facet counts
+    FACET_FIELDS = ('field', 'country', 'status')
+    FILTER_FIELDS = ('field', 'city', 'country', 'status')
+    
+    @classmethod
+    def filter_page(cls, filters=None, start_from=None, start_to=None, after=None, limit=50):
+        """
+        Filter conferences and count facets in one aggregation.
+        
+        The page is keyset-ordered by (start_date, id) like list_page; facet
+        counts cover the whole filtered set, not just the page.
+        Returns (rows, next_cursor, facets).
+        """
+        match = {key: value for key, value in (filters or {}).items() if key in cls.FILTER_FIELDS and value}
+        if start_from or start_to:
+            match['start_date'] = {}
+            if start_from:
+                match['start_date']['$gte'] = start_from
+            if start_to:
+                match['start_date']['$lte'] = start_to
+        
+        results = []
+        if after:
+            start_date, last_id = decode_cursor(after)
+            try:
+                start_date = datetime.fromisoformat(start_date)
+            except (TypeError, ValueError):
+                raise ValueError('Invalid cursor')
+            results.append({'$match': keyset_match('start_date', start_date, last_id)})
+        results += [
+            {'$sort': {'start_date': 1, '_id': 1}},
+            {'$limit': limit + 1},
+            {'$project': {field: 1 for field in cls.LIST_FIELDS}}
+        ]
+        
+        facets = {'results': results}
+        for field in cls.FACET_FIELDS:
+            facets[field] = [
+                {'$group': {'_id': '$' + field, 'count': {'$sum': 1}}},
+                {'$sort': {'count': -1, '_id': 1}}
+            ]
+        
+        output = next(cls._get_collection().aggregate([{'$match': match}, {'$facet': facets}]))
+        
+        docs = output['results']
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor(docs[-1]['start_date'], docs[-1]['_id'])
+        
+        facet_counts = {
+            field: [{'value': bucket['_id'], 'count': bucket['count']} for bucket in output[field]]
+            for field in cls.FACET_FIELDS
+        }
+        return [cls.summary_from_son(doc) for doc in docs], next_cursor, facet_counts
+    
+    @classmethod
+    def search(cls, text, filters=None, page=1, limit=20):
+        """
+        Relevance-ranked text search over name, description, field and city.
+        
+        filters may hold exact-match fields plus 'start_from'/'start_to' datetimes.
+        Returns (rows with a 'score', has_more).
+        """
+        filters = dict(filters or {})
+        start_from = filters.pop('start_from', None)
+        start_to = filters.pop('start_to', None)
+        
+        query = {'$text': {'$search': text}}
+        query.update({key: value for key, value in filters.items() if value})
+        if start_from or start_to:
+            query['start_date'] = {}
+            if start_from:
+                query['start_date']['$gte'] = start_from
+            if start_to:
+                query['start_date']['$lte'] = start_to
+        
+        projection = {field: 1 for field in cls.LIST_FIELDS}
+        projection['score'] = {'$meta': 'textScore'}
+        cursor = cls._get_collection().find(query, projection)
+        cursor = cursor.sort([('score', {'$meta': 'textScore'})]).skip((page - 1) * limit).limit(limit + 1)
+        
+        docs = list(cursor)
+        rows = []
+        for doc in docs[:limit]:
+            row = cls.summary_from_son(doc)
+            row['score'] = round(doc['score'], 4)
+            rows.append(row)
+        return rows, len(docs) > limit
+    
+    @classmethod
+    def get_cached(cls, conference_id):
+        """Fetch a conference by id through the per-worker read cache"""
+        son = _conference_cache.get(conference_id)
+        if son is None:
+            # The attendee array is never needed here; attendee_count carries the size
+            conference = cls.objects(id=conference_id).exclude('attendees').first()
+            if conference:
+                _conference_cache.set(conference_id, conference.to_mongo())
+            return conference
+        # Rebuild from the raw document so callers never share a mutable instance
+        return cls._from_son(son)
+    
+    @staticmethod
+    def invalidate_cache(conference_id):
+        """Drop a conference from the read cache after it is written"""
+        _conference_cache.invalidate(conference_id)
+    
+    def cache(self):
+        """Write-through: store the just-saved state in the read cache"""
+        _conference_cache.set(self.id, self.to_mongo())
+    
+    @classmethod
+    def collection_version(cls):
+        """(latest updated_at, estimated count): one index probe plus collection metadata"""
+        latest = cls._get_collection().find_one({}, {'updated_at': 1}, sort=[('updated_at', -1)])
+        return (latest or {}).get('updated_at'), cls.estimated_total()
+    
+    @classmethod
+    def estimated_total(cls):
+        """Collection size from metadata, without scanning"""
+        return cls._get_collection().estimated_document_count()
+    
+    @staticmethod
+    def summary_from_son(doc):
+        """Serialize a projected listing document"""
+        def iso(value):
+            return value.isoformat() if value else None
+        
+        return {
+            'id': doc['_id'],
+            'name': doc.get('name'),
+            'field': doc.get('field'),
+            'start_date': iso(doc.get('start_date')),
+            'end_date': iso(doc.get('end_date')),
+            'location': doc.get('location'),
+            'city': doc.get('city'),
+            'country': doc.get('country'),
+            'max_attendees': doc.get('max_attendees'),
+            'registration_fee': doc.get('registration_fee'),
+            'status': doc.get('status'),
+            'organizer_id': doc.get('organizer_id'),
+            'logo': doc.get('logo'),
+            'banner': doc.get('banner'),
+            'website': doc.get('website'),
+            'attendee_count': doc.get('attendee_count', 0),
+            'created_at': iso(doc.get('created_at'))
+        }
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -48,6 +250,6 @@ class MongoConference(Document):
             'logo': self.logo,
             'banner': self.banner,
             'website': self.website,
-            'attendee_count': len(self.attendees),
+            'attendee_count': self.attendee_count,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
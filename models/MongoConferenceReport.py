@@ -0,0 +1,158 @@
+from mongoengine import Document, StringField, DateTimeField, IntField, DictField
+from datetime import datetime, timedelta
+from models.MongoSession import MongoSession
+import os
+
+# Snapshots older than this are rebuilt on read, bounding drift from missed increments
+REPORT_MAX_STALENESS = timedelta(seconds=int(os.getenv('REPORT_MAX_STALENESS', 300)))
+
+class MongoConferenceReport(Document):
+    """
+    Materialized per-conference report snapshot.
+    
+    Kept current by small $set/$inc updates from session create/edit/delete and
+    seat registration, so reading a report is one primary-key fetch. Updates
+    never upsert: a missing snapshot is built in full on first read.
+    """
+    
+    conference_id = StringField(primary_key=True, required=True)
+    total_sessions = IntField(default=0)
+    session_registrations = IntField(default=0)
+    session_capacity = IntField(default=0)
+    sessions = DictField()  # session id -> summary fields
+    rebuilt_at = DateTimeField(default=datetime.utcnow)
+    updated_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'conference_reports',
+        'db_alias': 'default'
+    }
+    
+    SUMMARY_FIELDS = ('title', 'speaker', 'location', 'start_time', 'end_time', 'capacity')
+    
+    @classmethod
+    def summary(cls, conference_id, refresh=False):
+        """Report totals and session summaries, rebuilding when missing, stale or asked to"""
+        doc = None if refresh else cls._get_collection().find_one({'_id': conference_id})
+        if doc is None or datetime.utcnow() - doc.get('rebuilt_at', datetime.min) > REPORT_MAX_STALENESS:
+            doc = cls.rebuild(conference_id)
+        return cls._to_summary(doc)
+    
+    @classmethod
+    def rebuild(cls, conference_id):
+        """Recompute the snapshot from the sessions collection (one aggregation)"""
+        summary = MongoSession.conference_summary(conference_id)
+        now = datetime.utcnow()
+        doc = {
+            '_id': conference_id,
+            'total_sessions': summary['total_sessions'],
+            'session_registrations': summary['session_registrations'],
+            'session_capacity': summary['session_capacity'],
+            'sessions': {
+                row['id']: {
+                    'title': row['title'],
+                    'speaker': row['speaker'],
+                    'location': row['location'],
+                    'start_time': datetime.fromisoformat(row['start_time']) if row['start_time'] else None,
+                    'end_time': datetime.fromisoformat(row['end_time']) if row['end_time'] else None,
+                    'capacity': row['capacity'],
+                    'attendee_count': row['attendee_count']
+                }
+                for row in summary['sessions']
+            },
+            'rebuilt_at': now,
+            'updated_at': now
+        }
+        cls._get_collection().replace_one({'_id': conference_id}, doc, upsert=True)
+        return doc
+    
+    @classmethod
+    def session_added(cls, sess):
+        fields = {f'sessions.{sess.id}.{field}': getattr(sess, field) for field in cls.SUMMARY_FIELDS}
+        fields[f'sessions.{sess.id}.attendee_count'] = sess.attendee_count
+        fields['updated_at'] = datetime.utcnow()
+        cls._get_collection().update_one(
+            {'_id': sess.conference_id, f'sessions.{sess.id}': {'$exists': False}},
+            {
+                '$set': fields,
+                '$inc': {
+                    'total_sessions': 1,
+                    'session_capacity': sess.capacity,
+                    'session_registrations': sess.attendee_count
+                }
+            }
+        )
+    
+    @classmethod
+    def session_updated(cls, sess, previous_capacity):
+        fields = {f'sessions.{sess.id}.{field}': getattr(sess, field) for field in cls.SUMMARY_FIELDS}
+        fields['updated_at'] = datetime.utcnow()
+        cls._get_collection().update_one(
+            {'_id': sess.conference_id, f'sessions.{sess.id}': {'$exists': True}},
+            {'$set': fields, '$inc': {'session_capacity': sess.capacity - previous_capacity}}
+        )
+    
+    @classmethod
+    def session_removed(cls, sess):
+        cls._get_collection().update_one(
+            {'_id': sess.conference_id, f'sessions.{sess.id}': {'$exists': True}},
+            {
+                '$unset': {f'sessions.{sess.id}': ''},
+                '$set': {'updated_at': datetime.utcnow()},
+                '$inc': {
+                    'total_sessions': -1,
+                    'session_capacity': -sess.capacity,
+                    'session_registrations': -sess.attendee_count
+                }
+            }
+        )
+    
+    @classmethod
+    def registration_changed(cls, conference_id, session_id, delta):
+        """Apply a +1/-1 seat change from reserve_seat/release_seat"""
+        cls._get_collection().update_one(
+            {'_id': conference_id, f'sessions.{session_id}': {'$exists': True}},
+            {
+                '$set': {'updated_at': datetime.utcnow()},
+                '$inc': {
+                    f'sessions.{session_id}.attendee_count': delta,
+                    'session_registrations': delta
+                }
+            }
+        )
+    
+    @staticmethod
+    def _to_summary(doc):
+        """Shape a snapshot like MongoSession.conference_summary output"""
+        def iso(value):
+            return value.isoformat() if value else None
+        
+        sessions = []
+        for session_id, row in doc.get('sessions', {}).items():
+            capacity = row.get('capacity', 0)
+            attendee_count = row.get('attendee_count', 0)
+            sessions.append({
+                'id': session_id,
+                'title': row.get('title'),
+                'speaker': row.get('speaker'),
+                'location': row.get('location'),
+                'start_time': iso(row.get('start_time')),
+                'end_time': iso(row.get('end_time')),
+                'capacity': capacity,
+                'attendee_count': attendee_count,
+                'available_seats': capacity - attendee_count,
+                'fill_rate': round(attendee_count / capacity, 4) if capacity else 0
+            })
+        sessions.sort(key=lambda row: row['start_time'] or '')
+        
+        registrations = doc.get('session_registrations', 0)
+        capacity = doc.get('session_capacity', 0)
+        return {
+            'total_sessions': doc.get('total_sessions', 0),
+            'session_registrations': registrations,
+            'session_capacity': capacity,
+            'session_fill_rate': round(registrations / capacity, 4) if capacity else 0,
+            'sessions': sessions,
+            'snapshot_at': iso(doc.get('updated_at')),
+            'rebuilt_at': iso(doc.get('rebuilt_at'))
+        }
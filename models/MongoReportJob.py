@@ -0,0 +1,43 @@
+from mongoengine import Document, StringField, DateTimeField
+from datetime import datetime
+import uuid
+
+class MongoReportJob(Document):
+    """MongoDB Report Job Model (background report generation)"""
+    
+    id = StringField(primary_key=True, default=lambda: str(uuid.uuid4()))
+    report_type = StringField(required=True, choices=['conference', 'sessions', 'attendees'])
+    format = StringField(required=True)
+    conference_id = StringField(required=True)
+    requested_by = StringField(required=True)
+    status = StringField(default='queued', choices=['queued', 'running', 'done', 'failed'])
+    content_key = StringField(required=True)  # Hash of report type, format and data version
+    download_name = StringField()
+    error = StringField()
+    created_at = DateTimeField(default=datetime.utcnow)
+    started_at = DateTimeField()
+    finished_at = DateTimeField()
+    
+    meta = {
+        'collection': 'report_jobs',
+        'db_alias': 'default',
+        'indexes': [
+            ('content_key', 'status'),
+            ('requested_by', '-created_at'),
+            {'fields': ['created_at'], 'expireAfterSeconds': 7 * 86400}
+        ]
+    }
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'format': self.format,
+            'conference_id': self.conference_id,
+            'status': self.status,
+            'download_name': self.download_name,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
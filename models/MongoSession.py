@@ -1,5 +1,6 @@
 from mongoengine import Document, StringField, DateTimeField, IntField, ListField
 from datetime import datetime
+from pymongo import ReturnDocument
 
 class MongoSession(Document):
     """MongoDB Session Model"""
@@ -13,18 +14,286 @@ class MongoSession(Document):
     location = StringField(required=True)
     capacity = IntField(required=True, min_value=1)
     attendees = ListField(StringField(), default=[])
+    attendee_count = IntField(default=0)  # Kept in step with attendees via $inc
+    waitlist_count = IntField(default=0)  # Live MongoWaitlistEntry rows for this session
+    waitlist_seq = IntField(default=0)  # Last sequence number handed to the waitlist
     conference_id = StringField(required=True)
     created_at = DateTimeField(default=datetime.utcnow)
     updated_at = DateTimeField(default=datetime.utcnow)
     
     meta = {
         'collection': 'sessions',
-        'indexes': ['title', 'speaker', 'conference_id'],
+        'indexes': [
+            'title', 'speaker', 'conference_id',
+            ('conference_id', 'start_time'),
+            ('conference_id', 'location', 'start_time'),  # Room interval indexes load from this
+            ('attendees', 'start_time'),  # Multikey: a user's agenda in time order
+            ('conference_id', 'updated_at'),  # Calendar feed and listing versions
+            {
+                'fields': ['$title', '$speaker', '$description'],
+                'default_language': 'english',
+                'weights': {'title': 10, 'speaker': 5, 'description': 1},
+                'name': 'session_text'
+            }
+        ],
         'db_alias': 'default'
     }
     
-    def to_dict(self):
+    # Outcomes of reserve_seat / release_seat
+    RESERVED = 'reserved'
+    RELEASED = 'released'
+    ALREADY_REGISTERED = 'already_registered'
+    NOT_REGISTERED = 'not_registered'
+    FULL = 'full'
+    NOT_FOUND = 'not_found'
+    
+    _SEAT_FIELDS = {'title': 1, 'conference_id': 1, 'capacity': 1, 'attendee_count': 1, 'waitlist_count': 1}
+    
+    @classmethod
+    def reserve_seat(cls, session_id, user_id, from_waitlist=False):
+        """
+        Register a user in a single conditional update.
+        
+        The filter only matches while the user is absent and a seat is free, so
+        concurrent requests can never oversell. Direct registrations also require
+        an empty waitlist, so freed seats go to the queue first; promotions pass
+        from_waitlist=True and decrement waitlist_count in the same update.
+        Returns (outcome, session fields).
+        """
+        query = {
+            '_id': session_id,
+            'attendees': {'$ne': user_id},
+            '$expr': {'$lt': ['$attendee_count', '$capacity']}
+        }
+        inc = {'attendee_count': 1}
+        if from_waitlist:
+            inc['waitlist_count'] = -1
+        else:
+            query['waitlist_count'] = {'$not': {'$gt': 0}}
+        
+        doc = cls._get_collection().find_one_and_update(
+            query,
+            {
+                '$addToSet': {'attendees': user_id},
+                '$inc': inc,
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            projection=cls._SEAT_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            cls._report_registration(doc, 1)
+            return cls.RESERVED, doc
+        
+        # Slow path only: work out which predicate failed
+        doc = cls._get_collection().find_one({'_id': session_id}, cls._SEAT_FIELDS)
+        if not doc:
+            return cls.NOT_FOUND, None
+        if cls._get_collection().find_one({'_id': session_id, 'attendees': user_id}, {'_id': 1}):
+            return cls.ALREADY_REGISTERED, doc
+        return cls.FULL, doc
+    
+    @classmethod
+    def release_seat(cls, session_id, user_id):
+        """Unregister a user with a single $pull/$inc update. Returns (outcome, session fields)"""
+        doc = cls._get_collection().find_one_and_update(
+            {'_id': session_id, 'attendees': user_id},
+            {
+                '$pull': {'attendees': user_id},
+                '$inc': {'attendee_count': -1},
+                '$set': {'updated_at': datetime.utcnow()}
+            },
+            projection=cls._SEAT_FIELDS,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc:
+            cls._report_registration(doc, -1)
+            return cls.RELEASED, doc
+        
+        doc = cls._get_collection().find_one({'_id': session_id}, cls._SEAT_FIELDS)
+        if not doc:
+            return cls.NOT_FOUND, None
+        return cls.NOT_REGISTERED, doc
+    
+    # Fields returned by listing and search endpoints (the attendee array stays server-side)
+    LIST_FIELDS = (
+        'title', 'description', 'speaker', 'start_time', 'end_time', 'location',
+        'capacity', 'attendee_count', 'waitlist_count', 'conference_id', 'created_at'
+    )
+    
+    @classmethod
+    def search(cls, text, filters=None, page=1, limit=20):
+        """Relevance-ranked text search over title, speaker and description. Returns (rows, has_more)"""
+        query = {'$text': {'$search': text}}
+        query.update({key: value for key, value in (filters or {}).items() if value})
+        
+        projection = {field: 1 for field in cls.LIST_FIELDS}
+        projection['score'] = {'$meta': 'textScore'}
+        cursor = cls._get_collection().find(query, projection)
+        cursor = cursor.sort([('score', {'$meta': 'textScore'})]).skip((page - 1) * limit).limit(limit + 1)
+        
+        docs = list(cursor)
+        rows = []
+        for doc in docs[:limit]:
+            row = cls.summary_from_son(doc)
+            row['score'] = round(doc['score'], 4)
+            rows.append(row)
+        return rows, len(docs) > limit
+    
+    @classmethod
+    def agenda(cls, user_id, conference_id=None, fields=None):
+        """Sessions the user is registered for, earliest first, from the attendees multikey index"""
+        query = {'attendees': user_id}
+        if conference_id:
+            query['conference_id'] = conference_id
+        projection = {field: 1 for field in (fields or cls.LIST_FIELDS)}
+        return list(cls._get_collection().find(query, projection).sort('start_time', 1))
+    
+    @classmethod
+    def agenda_clashes(cls, user_id, session_id):
+        """
+        The user's registered sessions that overlap session_id, or None if it does not exist.
+        
+        Two indexed reads: the target's times and the user's agenda sorted by start.
+        """
+        # Imported here: the interval index loads sessions through this model
+        from utils.room_schedule import IntervalIndex, entry_for
+        
+        target = cls._get_collection().find_one({'_id': session_id}, {'start_time': 1, 'end_time': 1})
+        if not target:
+            return None
+        agenda = IntervalIndex(
+            entry_for(doc) for doc in cls.agenda(user_id, fields=('title', 'location', 'start_time', 'end_time'))
+        )
+        return agenda.conflicts(target['start_time'], target['end_time'], exclude_id=session_id)
+    
+    # Fields written to calendar feeds
+    CALENDAR_FIELDS = ('title', 'description', 'speaker', 'location', 'start_time', 'end_time', 'updated_at')
+    
+    @classmethod
+    def version_of(cls, query):
+        """
+        Validator fields for the sessions matching query, from one indexed aggregation.
+        
+        Every seat and waitlist change sets updated_at, so count and latest
+        updated_at identify the state; deletes only show in the count.
+        """
+        pipeline = [
+            {'$match': query},
+            {'$group': {
+                '_id': None,
+                'count': {'$sum': 1},
+                'updated_at': {'$max': '$updated_at'}
+            }}
+        ]
+        for doc in cls._get_collection().aggregate(pipeline):
+            del doc['_id']
+            return doc
+        return {'count': 0, 'updated_at': None}
+    
+    @classmethod
+    def session_version(cls, session_id):
+        """updated_at of one session, or None if it does not exist"""
+        return cls._get_collection().find_one({'_id': session_id}, {'updated_at': 1})
+    
+    @staticmethod
+    def summary_from_son(doc):
+        """Serialize a projected listing document"""
+        def iso(value):
+            return value.isoformat() if value else None
+        
+        capacity = doc.get('capacity', 0)
+        attendee_count = doc.get('attendee_count', 0)
+        return {
+            'id': doc['_id'],
+            'title': doc.get('title'),
+            'description': doc.get('description'),
+            'speaker': doc.get('speaker'),
+            'start_time': iso(doc.get('start_time')),
+            'end_time': iso(doc.get('end_time')),
+            'location': doc.get('location'),
+            'capacity': capacity,
+            'attendee_count': attendee_count,
+            'available_seats': capacity - attendee_count,
+            'waitlist_count': doc.get('waitlist_count', 0),
+            'conference_id': doc.get('conference_id'),
+            'created_at': iso(doc.get('created_at'))
+        }
+    
+    @classmethod
+    def conference_summary(cls, conference_id):
+        """
+        Session totals and per-session fill rates for one conference in a single aggregation.
+        
+        Only counters and display fields are projected; attendee arrays never leave the server.
+        """
+        attendee_count = {'$ifNull': ['$attendee_count', 0]}
+        pipeline = [
+            {'$match': {'conference_id': conference_id}},
+            {'$facet': {
+                'totals': [
+                    {'$group': {
+                        '_id': None,
+                        'total_sessions': {'$sum': 1},
+                        'registrations': {'$sum': attendee_count},
+                        'capacity': {'$sum': '$capacity'}
+                    }}
+                ],
+                'sessions': [
+                    {'$sort': {'start_time': 1}},
+                    {'$project': {
+                        'title': 1, 'speaker': 1, 'location': 1, 'start_time': 1, 'end_time': 1,
+                        'capacity': 1,
+                        'attendee_count': attendee_count,
+                        'fill_rate': {'$cond': [
+                            {'$gt': ['$capacity', 0]},
+                            {'$divide': [attendee_count, '$capacity']},
+                            0
+                        ]}
+                    }}
+                ]
+            }}
+        ]
+        output = next(cls._get_collection().aggregate(pipeline))
+        
+        totals = output['totals'][0] if output['totals'] else {'total_sessions': 0, 'registrations': 0, 'capacity': 0}
+        sessions = []
+        for doc in output['sessions']:
+            sessions.append({
+                'id': doc['_id'],
+                'title': doc.get('title'),
+                'speaker': doc.get('speaker'),
+                'location': doc.get('location'),
+                'start_time': doc['start_time'].isoformat() if doc.get('start_time') else None,
+                'end_time': doc['end_time'].isoformat() if doc.get('end_time') else None,
+                'capacity': doc.get('capacity', 0),
+                'attendee_count': doc['attendee_count'],
+                'available_seats': doc.get('capacity', 0) - doc['attendee_count'],
+                'fill_rate': round(doc['fill_rate'], 4)
+            })
+        
         return {
+            'total_sessions': totals['total_sessions'],
+            'session_registrations': totals['registrations'],
+            'session_capacity': totals['capacity'],
+            'session_fill_rate': round(totals['registrations'] / totals['capacity'], 4) if totals['capacity'] else 0,
+            'sessions': sessions
+        }
+    
+    @staticmethod
+    def _report_registration(doc, delta):
+        # Imported here: the report model builds on this one
+        from models.MongoConferenceReport import MongoConferenceReport
+        MongoConferenceReport.registration_changed(doc['conference_id'], doc['_id'], delta)
+    
+    @staticmethod
+    def seats_left(doc):
+        """Free seats from a document returned by reserve_seat/release_seat"""
+        return max(doc.get('capacity', 0) - doc.get('attendee_count', 0), 0)
+    
+    def to_dict(self, include_attendees=True):
+        """Serialize; pass include_attendees=False when the array was excluded from the query"""
+        data = {
             'id': self.id,
             'title': self.title,
             'description': self.description,
@@ -33,8 +302,12 @@ class MongoSession(Document):
             'end_time': self.end_time.isoformat(),
             'location': self.location,
             'capacity': self.capacity,
-            'attendees': self.attendees,
-            'available_seats': self.capacity - len(self.attendees),
+            'attendee_count': self.attendee_count,
+            'available_seats': self.capacity - self.attendee_count,
+            'waitlist_count': self.waitlist_count,
             'conference_id': self.conference_id,
             'created_at': self.created_at.isoformat()
         }
+        if include_attendees:
+            data['attendees'] = self.attendees
+        return data
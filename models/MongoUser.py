@@ -1,6 +1,15 @@
 from mongoengine import Document, StringField, EmailField, DateTimeField, BooleanField
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.passwords import hash_password, verify_password, needs_rehash, HashingBusy
+from utils.cache import TTLCache
+import os
+
+# Profile dicts by user id; password hashes are never loaded into this cache
+_profile_cache = TTLCache(
+    'user_profile',
+    maxsize=int(os.getenv('USER_PROFILE_CACHE_SIZE', 4096)),
+    ttl=float(os.getenv('USER_PROFILE_CACHE_TTL', 300))
+)
 
 class MongoUser(Document):
     """MongoDB User Model for Authentication"""
@@ -26,13 +35,58 @@ class MongoUser(Document):
         'strict': False
     }
     
+    # Fields loaded for profile lookups
+    PROFILE_FIELDS = ('username', 'email', 'full_name', 'is_active', 'created_at')
+    
+    @classmethod
+    def get_profile(cls, user_id):
+        """Profile dict (to_dict) through the per-worker cache, or None"""
+        profile = _profile_cache.get(user_id)
+        if profile is None:
+            user = cls.objects(id=user_id).only(*cls.PROFILE_FIELDS).first()
+            if not user:
+                return None
+            profile = user.to_dict()
+            _profile_cache.set(user_id, profile)
+        # Callers get their own copy
+        return dict(profile)
+    
+    @staticmethod
+    def invalidate_profile(user_id):
+        """Drop a cached profile after it changes or its user logs out"""
+        _profile_cache.invalidate(user_id)
+    
+    def save(self, *args, **kwargs):
+        # Attendee report artifacts are keyed on the users' latest updated_at
+        self.updated_at = datetime.utcnow()
+        result = super().save(*args, **kwargs)
+        _profile_cache.invalidate(self.id)
+        return result
+    
     def set_password(self, password):
-        """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        """Hash and set password (runs in the hashing pool; may raise HashingBusy)"""
+        self.password_hash = hash_password(password)
     
     def check_password(self, password):
-        """Verify password"""
-        return check_password_hash(self.password_hash, password)
+        """
+        Verify password in the hashing pool; may raise HashingBusy.
+        
+        A correct password stored with outdated hash parameters is rehashed and
+        written back, guarded on the old hash so a concurrent change wins.
+        """
+        if not verify_password(self.password_hash, password):
+            return False
+        
+        if needs_rehash(self.password_hash):
+            try:
+                new_hash = hash_password(password)
+            except HashingBusy:
+                return True  # Retried on a later login
+            if MongoUser.objects(id=self.id, password_hash=self.password_hash).update_one(
+                set__password_hash=new_hash
+            ):
+                self.password_hash = new_hash
+        return True
     
     def to_dict(self):
         return {
@@ -0,0 +1,160 @@
+from mongoengine import Document, StringField, DateTimeField, IntField
+from datetime import datetime
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.MongoSession import MongoSession
+import uuid
+
+class MongoWaitlistEntry(Document):
+    """MongoDB Session Waitlist Model (FIFO by seq within a session)"""
+    
+    id = StringField(primary_key=True, default=lambda: str(uuid.uuid4()))
+    session_id = StringField(required=True)
+    user_id = StringField(required=True)
+    seq = IntField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    
+    meta = {
+        'collection': 'session_waitlist',
+        'db_alias': 'default',
+        'indexes': [
+            {'fields': ('session_id', 'user_id'), 'unique': True},
+            ('session_id', 'seq')
+        ]
+    }
+    
+    # enqueue outcomes
+    WAITLISTED = 'waitlisted'
+    PROMOTED = 'promoted'
+    NOT_FOUND = 'not_found'
+    
+    @classmethod
+    def enqueue(cls, session_id, user_id):
+        """
+        Append a user to a session's waitlist; returns (outcome, position).
+        
+        The sequence number and waitlist_count come from one $inc on the session;
+        re-joining is idempotent through the unique (session_id, user_id) index.
+        If a seat is free once the entry is in place, the queue is promoted at
+        once and the outcome is PROMOTED when the user got the seat. NOT_FOUND
+        means the session does not exist (or was deleted under the request).
+        Position is only set for WAITLISTED.
+        """
+        sess = MongoSession._get_collection().find_one_and_update(
+            {'_id': session_id},
+            {'$inc': {'waitlist_seq': 1, 'waitlist_count': 1}, '$set': {'updated_at': datetime.utcnow()}},
+            projection={'waitlist_seq': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if not sess:
+            return cls.NOT_FOUND, None
+        
+        try:
+            cls._get_collection().insert_one({
+                '_id': str(uuid.uuid4()),
+                'session_id': session_id,
+                'user_id': user_id,
+                'seq': sess['waitlist_seq'],
+                'created_at': datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            # Already queued: undo the speculative count
+            cls._waitlist_changed(session_id, -1)
+        except Exception:
+            # A raised count with no entry would refuse direct registrations for good
+            cls._waitlist_changed(session_id, -1)
+            raise
+        
+        # A seat freed before the insert found no entry to promote, so check again now
+        # (this also unsticks a queue left behind free seats)
+        cls.promote_if_seats_free(session_id)
+        position = cls.position(session_id, user_id)
+        if position is not None:
+            return cls.WAITLISTED, position
+        
+        # The entry is gone: promoted here or by a concurrent promoter, or dropped with the session
+        if MongoSession._get_collection().find_one({'_id': session_id, 'attendees': user_id}, {'_id': 1}):
+            return cls.PROMOTED, None
+        return cls.NOT_FOUND, None
+    
+    @staticmethod
+    def _waitlist_changed(session_id, delta):
+        # updated_at moves with the counter so conditional GETs see every queue change
+        MongoSession._get_collection().update_one(
+            {'_id': session_id},
+            {'$inc': {'waitlist_count': delta}, '$set': {'updated_at': datetime.utcnow()}}
+        )
+    
+    @classmethod
+    def promote_if_seats_free(cls, session_id):
+        """Promote from the head of the queue when the session has free seats"""
+        sess = MongoSession._get_collection().find_one({'_id': session_id}, {'capacity': 1, 'attendee_count': 1})
+        if sess and MongoSession.seats_left(sess) > 0:
+            return cls.promote(session_id)
+        return []
+    
+    @classmethod
+    def position(cls, session_id, user_id):
+        """
+        1-based position in the queue, or None if the user is not waiting.
+        
+        Users can leave from the middle of the queue, so seq minus the head's
+        seq would overcount; the position is a count over the (session_id, seq)
+        index instead. That reads one index key per user ahead, not O(1), but
+        never touches the entries themselves.
+        """
+        entry = cls._get_collection().find_one({'session_id': session_id, 'user_id': user_id}, {'seq': 1})
+        if not entry:
+            return None
+        return cls._get_collection().count_documents({'session_id': session_id, 'seq': {'$lt': entry['seq']}}) + 1
+    
+    @classmethod
+    def leave(cls, session_id, user_id):
+        """Remove a user from the waitlist; False if they were not on it"""
+        removed = cls._get_collection().delete_one({'session_id': session_id, 'user_id': user_id})
+        if removed.deleted_count:
+            cls._waitlist_changed(session_id, -1)
+            return True
+        return False
+    
+    @classmethod
+    def promote(cls, session_id, limit=None):
+        """
+        Move users from the head of the queue into free seats.
+        
+        Each head entry is claimed with find_one_and_delete, so concurrent
+        promoters never hand out the same entry twice; the seat itself is taken
+        with MongoSession.reserve_seat. Returns the promoted user ids.
+        """
+        promoted = []
+        collection = cls._get_collection()
+        
+        while limit is None or len(promoted) < limit:
+            entry = collection.find_one_and_delete({'session_id': session_id}, sort=[('seq', 1)])
+            if not entry:
+                break
+            
+            outcome, _ = MongoSession.reserve_seat(session_id, entry['user_id'], from_waitlist=True)
+            
+            if outcome == MongoSession.RESERVED:
+                promoted.append(entry['user_id'])
+            elif outcome == MongoSession.FULL:
+                # No seat after all: put the entry back at the head with its original seq
+                collection.insert_one(entry)
+                break
+            elif outcome == MongoSession.ALREADY_REGISTERED:
+                cls._waitlist_changed(session_id, -1)
+            else:
+                collection.delete_many({'session_id': session_id})
+                break
+        
+        return promoted
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'session_id': self.session_id,
+            'user_id': self.user_id,
+            'seq': self.seq,
+            'created_at': self.created_at.isoformat()
+        }
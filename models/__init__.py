@@ -4,10 +4,16 @@ from .MongoUser import MongoUser
 from .MongoConference import MongoConference
 from .MongoSession import MongoSession
 from .MongoAttendee import MongoAttendee
+from .MongoWaitlistEntry import MongoWaitlistEntry
+from .MongoConferenceReport import MongoConferenceReport
+from .MongoReportJob import MongoReportJob
 
 __all__ = [
     'MongoUser',
     'MongoConference', 
     'MongoSession',
-    'MongoAttendee'
+    'MongoAttendee',
+    'MongoWaitlistEntry',
+    'MongoConferenceReport',
+    'MongoReportJob'
 ]
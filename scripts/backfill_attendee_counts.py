@@ -0,0 +1,27 @@
+"""
+Backfill attendee_count on conferences and sessions
+Run once after deploying the denormalized counters; safe to re-run
+"""
+
+import os
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Server-side pipeline update: the arrays never leave the database
+SET_COUNT = [{'$set': {'attendee_count': {'$size': {'$ifNull': ['$attendees', []]}}}}]
+
+def backfill():
+    """Recompute attendee_count from the attendees array"""
+    client = MongoClient(os.getenv('MONGODB_URI'))
+    db = client[os.getenv('DATABASE_NAME', 'conference_db')]
+
+    for collection_name in ('conferences', 'sessions'):
+        result = db[collection_name].update_many({}, SET_COUNT)
+        print(f"✓ {collection_name}: {result.modified_count} of {result.matched_count} documents updated")
+
+    client.close()
+
+if __name__ == '__main__':
+    backfill()
@@ -0,0 +1,118 @@
+"""
+Query-count regression benchmark for the attendee report
+
+Resolves a synthetic attendee list through utils.reports.iter_attendees and
+counts the find and getMore commands sent to MongoDB. The report must cost
+one round trip per chunk of ids (not one per attendee, and no getMore for a
+chunk larger than a default first batch) and must keep the attendee order.
+
+Usage: python scripts/benchmark_attendee_report.py [--attendees 5000] [--legacy]
+Requires MONGODB_URI; the benchmark users are deleted afterwards.
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from datetime import datetime
+
+from dotenv import load_dotenv
+from mongoengine import connect
+from pymongo import monitoring
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.MongoUser import MongoUser
+from utils.reports import iter_attendees, ATTENDEE_CHUNK_SIZE
+
+load_dotenv()
+
+class FindCounter(monitoring.CommandListener):
+    """Counts find and getMore round trips against the users collection"""
+
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        if event.command_name == 'find' and event.command.get('find') == 'users':
+            self.count += 1
+        elif event.command_name == 'getMore' and event.command.get('collection') == 'users':
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+def print_header(text):
+    """Print formatted header"""
+    print(f"\n{'='*70}")
+    print(f"  {text}")
+    print(f"{'='*70}\n")
+
+def legacy_rows(attendee_ids):
+    """The previous one-query-per-attendee loop"""
+    for attendee_id in attendee_ids:
+        user = MongoUser.objects(id=attendee_id).first()
+        if user:
+            yield user.email
+
+def measure(label, counter, produce):
+    counter.count = 0
+    started = time.perf_counter()
+    rows = list(produce())
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} rows={len(rows):<7} queries={counter.count:<7} elapsed={elapsed:.3f}s")
+    return rows, counter.count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--attendees', type=int, default=5000)
+    parser.add_argument('--legacy', action='store_true', help='Also time the per-attendee loop')
+    args = parser.parse_args()
+
+    counter = FindCounter()
+    connect(
+        db=os.getenv('DATABASE_NAME', 'conference_db'),
+        host=os.getenv('MONGODB_URI'),
+        alias='default',
+        event_listeners=[counter]
+    )
+
+    print_header(f"Attendee report: {args.attendees} attendees, chunk size {ATTENDEE_CHUNK_SIZE}")
+
+    # Reverse insertion order so the check really exercises order preservation
+    attendee_ids = [f'bench-attendee-{i:06d}' for i in range(args.attendees)][::-1]
+    now = datetime.utcnow()
+    MongoUser._get_collection().insert_many([
+        {
+            '_id': attendee_id,
+            'username': attendee_id,
+            'email': f'{attendee_id}@bench.invalid',
+            'password_hash': '-',
+            'full_name': f'Benchmark {attendee_id}',
+            'created_at': now
+        }
+        for attendee_id in sorted(attendee_ids)
+    ])
+
+    try:
+        rows, queries = measure('batched', counter, lambda: iter_attendees(attendee_ids))
+        if args.legacy:
+            measure('legacy', counter, lambda: legacy_rows(attendee_ids))
+
+        expected = math.ceil(args.attendees / ATTENDEE_CHUNK_SIZE)
+        assert queries <= expected, f"expected at most {expected} queries, got {queries}"
+        assert [row['username'] for row in rows] == attendee_ids, "attendee order not preserved"
+        print(f"\n✓ {queries} queries for {args.attendees} attendees (bound {expected}); order preserved")
+        return 0
+    except AssertionError as e:
+        print(f"\n✗ {e}")
+        return 1
+    finally:
+        MongoUser._get_collection().delete_many({'_id': {'$in': attendee_ids}})
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Login throughput benchmark for password hash parameters
+
+Simulates one gthread worker (gunicorn --worker-class gthread --threads N):
+a burst of logins and a stream of cheap requests for other routes share the
+worker's request threads, and logins check passwords through utils.passwords
+with the configured hashing pool and queue cap. For each hash method it
+reports check latency, accepted logins per second, logins refused with 503
+(HashingBusy), and how long the other routes' requests took during the burst,
+so PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS and PASSWORD_HASH_QUEUE can be
+chosen against the login load.
+
+Usage: python scripts/benchmark_password_hashing.py [--logins 200] [--threads 8]
+       [--workers 2] [--queue 4] [--methods pbkdf2:sha256:600000 scrypt:32768:8:1]
+       [--csv results.csv]
+Pass --queue equal to --threads to see the burst take every request thread.
+No database is needed.
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_METHODS = [
+    'pbkdf2:sha256:260000',
+    'pbkdf2:sha256:600000',
+    'scrypt:16384:8:1',
+    'scrypt:32768:8:1'
+]
+
+def print_header(text):
+    """Print formatted header"""
+    print(f"\n{'='*70}")
+    print(f"  {text}")
+    print(f"{'='*70}\n")
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+def measure(method, logins, threads, workers, queue):
+    """Run `logins` logins and as many other requests on `threads` request threads"""
+    from utils.passwords import verify_password, HashingBusy
+
+    stored = generate_password_hash('benchmark-password', method)
+    login_latencies, other_latencies = [], []
+    rejected = 0
+
+    def login(submitted):
+        nonlocal rejected
+        try:
+            verify_password(stored, 'benchmark-password')
+            login_latencies.append(time.perf_counter() - submitted)
+        except HashingBusy:
+            rejected += 1
+
+    def other_route(submitted):
+        sum(range(1000))
+        other_latencies.append(time.perf_counter() - submitted)
+
+    started = time.perf_counter()
+    # The worker's request threads; queueing here is what a client would wait for
+    with ThreadPoolExecutor(max_workers=threads) as request_threads:
+        for _ in range(logins):
+            request_threads.submit(login, time.perf_counter())
+            request_threads.submit(other_route, time.perf_counter())
+    elapsed = time.perf_counter() - started
+
+    return {
+        'method': method,
+        'threads': threads,
+        'hash_workers': workers,
+        'hash_queue': queue,
+        'login_p50_ms': ms(statistics.median(login_latencies)) if login_latencies else None,
+        'login_p95_ms': ms(percentile(login_latencies, 0.95)),
+        'logins_per_s': round(len(login_latencies) / elapsed, 1),
+        'rejected': rejected,
+        'other_p50_ms': ms(statistics.median(other_latencies)),
+        'other_p95_ms': ms(percentile(other_latencies, 0.95))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=8, help="gunicorn --threads per worker")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('PASSWORD_HASH_WORKERS', 2)))
+    parser.add_argument('--queue', type=int, default=int(os.getenv('PASSWORD_HASH_QUEUE', 4)))
+    parser.add_argument('--methods', nargs='+', default=DEFAULT_METHODS)
+    parser.add_argument('--csv', help='Append results to this CSV file')
+    args = parser.parse_args()
+
+    # utils.passwords reads its pool settings at import
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['PASSWORD_HASH_QUEUE'] = str(args.queue)
+
+    print_header(
+        f"gthread worker: {args.threads} request threads, {args.workers} hashing threads, "
+        f"queue cap {args.queue}, {os.cpu_count()} CPUs, {args.logins} logins"
+    )
+    print(f"{'method':<24}{'login p50':>10}{'login p95':>10}{'logins/s':>10}{'503s':>6}"
+          f"{'other p50':>11}{'other p95':>11}")
+
+    results = []
+    for method in args.methods:
+        result = measure(method, args.logins, args.threads, args.workers, args.queue)
+        results.append(result)
+        print(f"{result['method']:<24}{str(result['login_p50_ms']):>10}{str(result['login_p95_ms']):>10}"
+              f"{result['logins_per_s']:>10}{result['rejected']:>6}"
+              f"{str(result['other_p50_ms']):>11}{str(result['other_p95_ms']):>11}")
+    print("\nLatencies in ms, measured from submission to a request thread")
+
+    if args.csv:
+        new_file = not os.path.exists(args.csv)
+        with open(args.csv, 'a', newline='') as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(results[0]))
+            if new_file:
+                writer.writeheader()
+            writer.writerows(results)
+        print(f"\n✓ Results appended to {args.csv}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
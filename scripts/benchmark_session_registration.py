@@ -0,0 +1,116 @@
+"""
+Concurrency benchmark for session seat reservation
+
+Fires many parallel registrations at one session and checks that the final
+attendee list, the attendee_count counter and the capacity all agree. The
+legacy read-check-append-save flow is run first for comparison.
+
+Usage: python scripts/benchmark_session_registration.py [--users 500] [--capacity 100] [--threads 64]
+Requires MONGODB_URI; the benchmark session is deleted afterwards.
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from mongoengine import connect
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.MongoSession import MongoSession
+
+load_dotenv()
+
+def print_header(text):
+    """Print formatted header"""
+    print(f"\n{'='*70}")
+    print(f"  {text}")
+    print(f"{'='*70}\n")
+
+def create_bench_session(capacity):
+    """Create a throwaway session for the run"""
+    start = datetime.utcnow() + timedelta(days=30)
+    sess = MongoSession(
+        id=f'bench-{uuid.uuid4()}',
+        title='Registration benchmark',
+        description='Temporary session created by benchmark_session_registration.py',
+        speaker='benchmark',
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        location='benchmark',
+        capacity=capacity,
+        conference_id='benchmark'
+    )
+    sess.save()
+    return sess.id
+
+def legacy_register(session_id, user_id):
+    """The previous read-check-append-save flow"""
+    sess = MongoSession.objects(id=session_id).first()
+    if user_id in sess.attendees or len(sess.attendees) >= sess.capacity:
+        return False
+    sess.attendees.append(user_id)
+    sess.save()
+    return True
+
+def atomic_register(session_id, user_id):
+    outcome, _ = MongoSession.reserve_seat(session_id, user_id)
+    return outcome == MongoSession.RESERVED
+
+def run(label, register, users, capacity, threads):
+    """Register `users` distinct users concurrently and report the outcome"""
+    print_header(label)
+    session_id = create_bench_session(capacity)
+    user_ids = [f'bench-user-{i}' for i in range(users)]
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            accepted = sum(pool.map(lambda uid: register(session_id, uid), user_ids))
+        elapsed = time.perf_counter() - started
+
+        doc = MongoSession._get_collection().find_one({'_id': session_id})
+        stored = len(doc.get('attendees', []))
+        counter = doc.get('attendee_count', 0)
+
+        print(f"Requests:            {users} ({threads} threads)")
+        print(f"Elapsed:             {elapsed:.3f}s ({users / elapsed:.0f} registrations/s)")
+        print(f"Capacity:            {capacity}")
+        print(f"Accepted responses:  {accepted}")
+        print(f"Stored attendees:    {stored}")
+        print(f"attendee_count:      {counter}")
+
+        correct = accepted == stored == min(users, capacity) and (counter == stored or register is legacy_register)
+        print(f"\n{'✓' if correct else '✗'} {'Counts consistent' if correct else 'Oversold or lost registrations'}")
+        return correct
+    finally:
+        MongoSession.objects(id=session_id).delete()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--capacity', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only benchmark the atomic path')
+    args = parser.parse_args()
+
+    connect(
+        db=os.getenv('DATABASE_NAME', 'conference_db'),
+        host=os.getenv('MONGODB_URI'),
+        alias='default',
+        maxPoolSize=max(args.threads, 100)
+    )
+
+    if not args.skip_legacy:
+        run('Legacy read-check-save', legacy_register, args.users, args.capacity, args.threads)
+
+    ok = run('Atomic conditional update', atomic_register, args.users, args.capacity, args.threads)
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -41,7 +41,7 @@ def create_collections():
     print("\nCreating indexes...\n")
     
     # Conferences index
-    db.conferences.create_index('name')
+    db.conferences.create_index('name', unique=True)  # Duplicate names are rejected by this index
     db.conferences.create_index('start_date')
     print("✓ Created indexes for conferences")
     
@@ -56,6 +56,11 @@ def create_collections():
     db.attendees.create_index('name')
     print("✓ Created indexes for attendees")
     
+    # Users index (signup relies on these to reject duplicates)
+    db.users.create_index('username', unique=True)
+    db.users.create_index('email', unique=True)
+    print("✓ Created indexes for users")
+    
     # Registrations index
     db.registrations.create_index([('attendee_id', 1), ('session_id', 1)])
     print("✓ Created indexes for registrations")
@@ -0,0 +1,147 @@
+"""
+Streaming upload parsers and batched inserts for bulk imports
+
+Uploads are parsed record by record (CSV, NDJSON, a JSON array or iCalendar
+events) and written with one unordered insert_many per batch, so memory stays
+bounded by the batch size and duplicates are reported by the unique indexes
+instead of lookups.
+"""
+import csv
+import io
+import json
+import os
+from mongoengine.errors import ValidationError
+from pymongo.errors import BulkWriteError
+from utils.icalendar import iter_events
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+JSON_READ_SIZE = 64 * 1024
+DUPLICATE_KEY = 11000
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.ics': 'ics',
+    'text/csv': 'csv',
+    'application/json': 'json',
+    'application/x-ndjson': 'ndjson',
+    'text/calendar': 'ics'
+}
+
+
+class ImportFormatError(ValueError):
+    """The upload itself is malformed and parsing cannot continue"""
+
+
+def detect_format(filename=None, mimetype=None):
+    """Import format from the upload's file extension, else its content type"""
+    if filename:
+        fmt = IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+        if fmt:
+            return fmt
+    return IMPORT_FORMATS.get(mimetype)
+
+
+def iter_records(stream, fmt):
+    """Yield upload records one at a time from a binary stream"""
+    if fmt == 'ics':
+        return iter_events(stream)
+    reader = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    if fmt == 'csv':
+        return _iter_csv(reader)
+    if fmt == 'ndjson':
+        return _iter_ndjson(reader)
+    return _iter_json_array(reader)
+
+
+def _iter_csv(reader):
+    for row in csv.DictReader(reader):
+        yield {(key or '').strip().lower(): (value or '').strip() for key, value in row.items()}
+
+
+def _iter_ndjson(reader):
+    for number, line in enumerate(reader, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            raise ImportFormatError(f'Invalid JSON on line {number}')
+
+
+def _iter_json_array(reader):
+    """Decode the elements of a top-level JSON array without loading the whole document"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+
+    def fill():
+        nonlocal buffer
+        chunk = reader.read(JSON_READ_SIZE)
+        buffer += chunk
+        return bool(chunk)
+
+    while not buffer.strip():
+        if not fill():
+            return
+    buffer = buffer.lstrip()
+    if buffer[0] != '[':
+        raise ImportFormatError('Expected a JSON array of records')
+    buffer = buffer[1:]
+
+    expect_value = True
+    while True:
+        buffer = buffer.lstrip()
+        if not buffer:
+            if not fill():
+                raise ImportFormatError('Unterminated JSON array')
+            continue
+        if buffer[0] == ']':
+            return
+        if not expect_value:
+            if buffer[0] != ',':
+                raise ImportFormatError('Expected "," between records')
+            buffer = buffer[1:]
+            expect_value = True
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except ValueError:
+            # Most likely a record split across reads
+            if fill():
+                continue
+            raise ImportFormatError('Invalid JSON record')
+        buffer = buffer[end:]
+        expect_value = False
+        yield value
+
+
+def insert_batch(collection, docs):
+    """
+    Insert docs with one unordered insert_many.
+
+    Returns {index in docs: (status, message)} for the documents that were not
+    written; status is 'duplicate' for unique index violations, else 'failed'.
+    """
+    if not docs:
+        return {}
+    try:
+        collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        errors = {}
+        for error in e.details.get('writeErrors', []):
+            status = 'duplicate' if error.get('code') == DUPLICATE_KEY else 'failed'
+            errors[error['index']] = (status, error.get('errmsg', ''))
+        return errors
+    return {}
+
+
+def validation_message(error):
+    """Readable message for a rejected row, per field for mongoengine ValidationErrors"""
+    if isinstance(error, ValidationError):
+        fields = error.to_dict()
+        if fields:
+            return '; '.join(f'{field}: {message}' for field, message in fields.items())
+        return error.message
+    return str(error)
@@ -0,0 +1,71 @@
+"""
+In-process caches
+
+Each gunicorn worker holds its own copy, so invalidation is local to the
+worker that performed the write; the TTL bounds staleness everywhere else.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_registry = {}
+
+
+class TTLCache:
+    """Thread-safe bounded LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, name, maxsize=1024, ttl=30):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def get(self, key):
+        """Return the cached value or None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def cache_stats():
+    """Stats for every cache created in this process"""
+    return {name: cache.stats() for name, cache in _registry.items()}
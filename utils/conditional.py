@@ -0,0 +1,90 @@
+"""
+Conditional GET support
+
+Handlers compute a validator (ETag and optional Last-Modified) from cheap
+metadata such as updated_at and counters, and only query and serialize the
+full payload when the client's copy is stale. Cache-Control defaults are set
+per blueprint by an after_request hook.
+"""
+import hashlib
+from datetime import timezone
+from flask import Response, request
+
+# Applied to GET responses that did not set Cache-Control themselves
+CACHE_POLICIES = {
+    'conference': 'private, no-cache',
+    'session': 'private, no-cache',
+    'search': 'private, no-cache',
+    'calendar': 'no-cache',
+    'report': 'private, no-cache',
+    'auth': 'no-store',
+    'user': 'no-store',
+    'payment': 'no-store',
+    'export': 'no-store'
+}
+
+
+def make_etag(*parts):
+    """Strong ETag over the given validator parts"""
+    version = ':'.join('-' if part is None else str(part) for part in parts)
+    return hashlib.sha256(version.encode('utf-8')).hexdigest()[:32]
+
+
+def _utc(value):
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def is_not_modified(etag, last_modified=None):
+    """
+    True when the client's copy is current.
+
+    If-None-Match wins when present and uses the weak comparison RFC 7232
+    requires, so a W/ copy from a compressing proxy still matches.
+    If-Modified-Since is only consulted without it, at the one-second
+    resolution of HTTP dates.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    since = request.if_modified_since
+    if since is not None and last_modified is not None:
+        return _utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def conditional(etag, last_modified, build, vary=None):
+    """
+    304 when the client's copy is current, else build() (a response or (body, status)).
+
+    Validators are only attached to 200 responses from build().
+    """
+    if is_not_modified(etag, last_modified):
+        response = Response(status=304)
+    else:
+        result = build()
+        response, status = (result if isinstance(result, tuple) else (result, 200))
+        if not isinstance(response, Response):
+            response = Response(response)
+        response.status_code = status
+        if status != 200:
+            return response
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _utc(last_modified)
+    if vary:
+        response.vary.add(vary)
+    return response
+
+
+def apply_cache_policy(response):
+    """after_request hook: default Cache-Control for GET responses by blueprint"""
+    if request.method in ('GET', 'HEAD') and 'Cache-Control' not in response.headers:
+        policy = CACHE_POLICIES.get(request.blueprint)
+        if policy:
+            response.headers['Cache-Control'] = policy
+    return response
+
+
+def init_app(app):
+    app.after_request(apply_cache_policy)
@@ -0,0 +1,31 @@
+"""
+Database error helpers
+"""
+import re
+from pymongo.errors import DuplicateKeyError
+
+_INDEX_NAME = re.compile(r'index: (\S+) dup key')
+_FIRST_FIELD = re.compile(r'(.+?)(?:_-?1(?:_|$)|$)')
+
+
+def duplicate_key_field(error):
+    """
+    First field of the unique index a duplicate key error came from, or None.
+
+    Accepts pymongo's DuplicateKeyError or mongoengine's NotUniqueError, which
+    is raised from inside the handler of the original error.
+    """
+    original = error
+    while original is not None and not isinstance(original, DuplicateKeyError):
+        original = original.__cause__ or original.__context__
+    if original is not None:
+        key_pattern = (original.details or {}).get('keyPattern')
+        if key_pattern:
+            return next(iter(key_pattern))
+        error = original
+
+    # Older servers only name the index in the message, e.g. 'email_1'
+    match = _INDEX_NAME.search(str(error))
+    if match:
+        return _FIRST_FIELD.match(match.group(1)).group(1)
+    return None
@@ -0,0 +1,163 @@
+"""
+Minimal iCalendar (RFC 5545) support for session schedules
+"""
+import io
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+
+def _unfold(reader):
+    """Join folded content lines (continuations start with a space or tab)"""
+    current = None
+    for raw in reader:
+        line = raw.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _split(line):
+    """'NAME;PARAM=x:value' -> ('NAME', {'PARAM': 'x'}, 'value')"""
+    head, _, value = line.partition(':')
+    name, *params = head.split(';')
+    parameters = {}
+    for param in params:
+        key, _, param_value = param.partition('=')
+        parameters[key.upper()] = param_value.strip('"')
+    return name.upper(), parameters, value
+
+
+def unescape_text(value):
+    result, chars = [], iter(value)
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, '')
+            result.append('\n' if escaped in ('n', 'N') else escaped)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+
+def parse_datetime(value, params=None):
+    """DATE or DATE-TIME value as a naive UTC datetime (floating times are kept as given)"""
+    params = params or {}
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d')
+    if value.endswith('Z'):
+        return datetime.strptime(value, '%Y%m%dT%H%M%SZ')
+    parsed = datetime.strptime(value, '%Y%m%dT%H%M%S')
+    tzid = params.get('TZID')
+    if tzid:
+        try:
+            parsed = parsed.replace(tzinfo=ZoneInfo(tzid)).astimezone(timezone.utc).replace(tzinfo=None)
+        except Exception:
+            raise ValueError(f'Unknown time zone: {tzid}')
+    return parsed
+
+
+def iter_events(stream):
+    """
+    Yield one dict per VEVENT in a binary .ics stream.
+
+    Keys follow the session fields: title, description, location, speaker
+    (ORGANIZER CN or X-SPEAKER), capacity (X-CAPACITY), start_time and end_time.
+    A value that cannot be parsed is reported under 'error' for that event.
+    """
+    reader = io.TextIOWrapper(stream, encoding='utf-8-sig')
+    event = None
+    for line in _unfold(reader):
+        if not line:
+            continue
+        name, params, value = _split(line)
+        if name == 'BEGIN' and value.upper() == 'VEVENT':
+            event = {}
+        elif name == 'END' and value.upper() == 'VEVENT':
+            if event is not None:
+                yield event
+            event = None
+        elif event is None:
+            continue
+        elif name == 'SUMMARY':
+            event['title'] = unescape_text(value)
+        elif name == 'DESCRIPTION':
+            event['description'] = unescape_text(value)
+        elif name == 'LOCATION':
+            event['location'] = unescape_text(value)
+        elif name == 'X-SPEAKER':
+            event['speaker'] = unescape_text(value)
+        elif name == 'ORGANIZER' and 'speaker' not in event:
+            event['speaker'] = params.get('CN') or value.replace('mailto:', '')
+        elif name == 'X-CAPACITY':
+            event['capacity'] = value
+        elif name == 'UID':
+            event['uid'] = value
+        elif name in ('DTSTART', 'DTEND'):
+            field = 'start_time' if name == 'DTSTART' else 'end_time'
+            try:
+                event[field] = parse_datetime(value, params)
+            except ValueError as e:
+                event.setdefault('error', f'{name}: {e}')
+
+
+def escape_text(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def format_datetime(value):
+    """Naive UTC datetime as a DATE-TIME value"""
+    return value.strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces, continuations starting with a space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    pieces, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split inside a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, 74
+    return '\r\n '.join(pieces)
+
+
+def render_calendar(name, sessions, stamp):
+    """
+    A VCALENDAR with one VEVENT per session document.
+
+    UIDs are the session ids, so calendar apps update events in place when a
+    session is moved instead of adding a copy. stamp is used as DTSTAMP.
+    """
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Conference Management System//Schedule//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}'
+    ]
+    for doc in sessions:
+        lines.extend([
+            'BEGIN:VEVENT',
+            f"UID:{doc['_id']}",
+            f'DTSTAMP:{format_datetime(stamp)}',
+            f"DTSTART:{format_datetime(doc['start_time'])}",
+            f"DTEND:{format_datetime(doc['end_time'])}",
+            f"SUMMARY:{escape_text(doc.get('title'))}",
+            f"LOCATION:{escape_text(doc.get('location'))}",
+            f"DESCRIPTION:{escape_text(doc.get('description'))}",
+            f"X-SPEAKER:{escape_text(doc.get('speaker'))}"
+        ])
+        if doc.get('updated_at'):
+            lines.append(f"LAST-MODIFIED:{format_datetime(doc['updated_at'])}")
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
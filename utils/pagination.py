@@ -0,0 +1,63 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a ?limit= value, clamped to [1, maximum]"""
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+    return min(limit, maximum)
+
+
+def parse_page(value):
+    """Parse a 1-based ?page= value"""
+    if value in (None, ''):
+        return 1
+    try:
+        page = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('Invalid page')
+    if page < 1:
+        raise ValueError('Invalid page')
+    return page
+
+
+def encode_cursor(sort_value, doc_id):
+    """Encode the (sort key, id) of the last row of a page as an opaque token"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, doc_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor into (sort value, id)"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    return sort_value, doc_id
+
+
+def keyset_match(sort_field, sort_value, doc_id):
+    """Match rows strictly after (sort_value, doc_id) in ascending order"""
+    return {
+        '$or': [
+            {sort_field: {'$gt': sort_value}},
+            {sort_field: sort_value, '_id': {'$gt': doc_id}}
+        ]
+    }
@@ -0,0 +1,71 @@
+"""
+Password hashing off the request threads
+
+The app runs on gthread workers (see Procfile), so one worker serves several
+requests at once. hashlib's PBKDF2 and scrypt release the GIL, and hashes run
+in a small per-worker thread pool. PASSWORD_HASH_QUEUE caps how many request
+threads may be hashing or waiting for the pool. It is kept below the worker's
+thread count, so a login burst can never occupy every thread: checks beyond
+the cap are refused at once, and the remaining threads keep serving other
+routes.
+
+The hash method is configurable; stored hashes made with other parameters
+are replaced on the next successful login (see MongoUser.check_password).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Any werkzeug method string with explicit parameters, e.g. 'scrypt:32768:8:1'
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+PASSWORD_SALT_LENGTH = int(os.getenv('PASSWORD_SALT_LENGTH', 16))
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+# Request threads hashing or waiting per worker before new checks are refused;
+# keep it below gunicorn's --threads so other routes always have threads left
+PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 4))
+
+_lock = threading.Lock()
+_pool = None
+_pool_pid = None
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing queue is full; callers answer 503"""
+
+
+def _executor():
+    # Created lazily and per process, so forked gunicorn workers get their own threads
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy('Too many password checks in progress')
+    try:
+        return _executor().submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password, method=None):
+    """Hash with the configured method in the hashing pool"""
+    return _run(generate_password_hash, password, method or PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash in the hashing pool"""
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    """True when the stored hash was made with other parameters than the configured ones"""
+    return password_hash.split('$', 1)[0] != PASSWORD_HASH_METHOD
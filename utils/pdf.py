@@ -0,0 +1,122 @@
+"""
+Minimal PDF writer for tabular reports
+
+Produces a plain PDF 1.4 document (landscape A4, built-in Courier font) from
+the same rows the CSV exports use, so reports need no third-party renderer.
+"""
+
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 595
+MARGIN = 36
+FONT_SIZE = 8
+TITLE_SIZE = 12
+LEADING = 11
+CHAR_WIDTH = FONT_SIZE * 0.6  # Courier advance width
+LINE_CHARS = int((PAGE_WIDTH - 2 * MARGIN) / CHAR_WIDTH)
+PAGE_LINES = int((PAGE_HEIGHT - 2 * MARGIN) / LEADING)
+MAX_COLUMN_CHARS = 40
+
+
+def _text(value):
+    if value is None:
+        return ''
+    return str(value)
+
+
+def _escape(text):
+    # Fonts are declared WinAnsiEncoding (cp1252); anything outside it becomes '?'
+    text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('cp1252', 'replace').decode('latin-1')
+
+
+def _fit(text, width):
+    return text if len(text) <= width else text[:width - 1] + '~'
+
+
+def layout_rows(rows):
+    """
+    Turn report rows into text lines.
+
+    Rows with three or more cells form a table whose columns are sized to their
+    content; shorter rows (titles, label/value pairs) are written as free text.
+    """
+    rows = [[_text(cell) for cell in row] for row in rows]
+
+    widths = []
+    for row in rows:
+        if len(row) >= 3:
+            for i, cell in enumerate(row):
+                if i == len(widths):
+                    widths.append(0)
+                widths[i] = max(widths[i], min(len(cell), MAX_COLUMN_CHARS))
+
+    # Shrink the widest columns until the table fits the page
+    while widths and sum(widths) + 2 * (len(widths) - 1) > LINE_CHARS:
+        widest = widths.index(max(widths))
+        widths[widest] -= 1
+
+    lines = []
+    for row in rows:
+        if len(row) >= 3:
+            cells = [_fit(cell, widths[i]).ljust(widths[i]) for i, cell in enumerate(row)]
+            lines.append('  '.join(cells).rstrip())
+        else:
+            lines.append(_fit(': '.join(cell for cell in row if cell), LINE_CHARS))
+    return lines
+
+
+def render_pdf(rows):
+    """Render report rows as PDF bytes; the first row is used as the title"""
+    rows = list(rows)
+    title = ' '.join(_text(cell) for cell in rows[0]) if rows else ''
+    lines = layout_rows(rows[1:])
+
+    # The title takes two lines on the first page
+    first = PAGE_LINES - 2 if title else PAGE_LINES
+    pages = [lines[:first]] + [lines[i:i + PAGE_LINES] for i in range(first, len(lines), PAGE_LINES)]
+
+    # Object numbers: 1 catalog, 2 page tree, 3-4 fonts, then a page/content pair per page
+    objects = {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+        4: b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>'
+    }
+    kids = []
+    for number, page_lines in enumerate(pages):
+        page_id = 5 + 2 * number
+        content_id = page_id + 1
+        kids.append(f'{page_id} 0 R')
+
+        y = PAGE_HEIGHT - MARGIN
+        ops = ['BT']
+        if number == 0 and title:
+            ops.append(f'/F2 {TITLE_SIZE} Tf 1 0 0 1 {MARGIN} {y - TITLE_SIZE} Tm ({_escape(title)}) Tj')
+            y -= TITLE_SIZE + LEADING
+        ops.append(f'/F1 {FONT_SIZE} Tf {LEADING} TL 1 0 0 1 {MARGIN} {y - FONT_SIZE} Tm')
+        for line in page_lines:
+            ops.append(f'({_escape(line)}) Tj T*')
+        ops.append(f'1 0 0 1 {PAGE_WIDTH - MARGIN - 60} {MARGIN / 2} Tm (Page {number + 1} of {len(pages)}) Tj')
+        ops.append('ET')
+        stream = '\n'.join(ops).encode('latin-1')
+
+        objects[page_id] = (
+            f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+            f'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode()
+        objects[content_id] = b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode()
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = {}
+    for number in sorted(objects):
+        offsets[number] = len(output)
+        output += b'%d 0 obj\n' % number + objects[number] + b'\nendobj\n'
+
+    xref = len(output)
+    count = max(objects) + 1
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % count
+    for number in range(1, count):
+        output += b'%010d 00000 n \n' % offsets[number]
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (count, xref)
+    return bytes(output)
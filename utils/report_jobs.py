@@ -0,0 +1,283 @@
+"""
+Background report jobs and PDF rendering
+
+Jobs are persisted in the report_jobs collection and executed by a local
+process pool, so large exports never occupy a gunicorn request. Finished
+reports are written to REPORT_ARTIFACT_DIR under a content key derived from
+the report type, format and data version; an identical request for unchanged
+data reuses that file instead of queueing new work.
+
+PDF downloads are rendered in the same pool and cached under a hash of the
+report data itself, so an unchanged report is never rendered twice.
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from models.MongoConference import MongoConference
+from models.MongoConferenceReport import MongoConferenceReport
+from models.MongoReportJob import MongoReportJob
+from utils.streaming import csv_stream
+from utils.pdf import render_pdf
+from utils.reports import (
+    conference_report_data, sessions_report_data, attendees_report_data,
+    conference_csv_rows, sessions_csv_rows, attendees_csv_rows,
+    attendee_ids, attendees_version
+)
+
+ARTIFACT_DIR = os.path.abspath(os.getenv(
+    'REPORT_ARTIFACT_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'report_artifacts')
+))
+ARTIFACT_MAX_AGE = int(os.getenv('REPORT_ARTIFACT_MAX_AGE', 7 * 86400))
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+# Queued jobs older than this are resubmitted; running jobs past the timeout are reclaimed
+REQUEUE_AFTER = timedelta(seconds=int(os.getenv('REPORT_JOB_REQUEUE_AFTER', 300)))
+JOB_TIMEOUT = timedelta(seconds=int(os.getenv('REPORT_JOB_TIMEOUT', 1800)))
+# How long a PDF download waits for rendering before answering 202
+PDF_RENDER_TIMEOUT = int(os.getenv('REPORT_PDF_TIMEOUT', 20))
+
+REPORT_TYPES = ('conference', 'sessions', 'attendees')
+JOB_FORMATS = ('csv', 'json', 'pdf')
+MIMETYPES = {'csv': 'text/csv', 'json': 'application/json', 'pdf': 'application/pdf'}
+# Left out of the data hash: they change on every build without the data changing
+VOLATILE_FIELDS = ('generated_at', 'snapshot_at')
+
+CSV_ROWS = {
+    'conference': conference_csv_rows,
+    'sessions': sessions_csv_rows,
+    'attendees': attendees_csv_rows
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+_rendering = {}  # data key -> future of a PDF render in progress in this worker
+_rendering_lock = threading.Lock()
+
+
+def content_key(report_type, file_format, conference):
+    """Identify a report by what it is and the version of the data behind it"""
+    snapshot = MongoConferenceReport._get_collection().find_one({'_id': conference.id}, {'updated_at': 1})
+    parts = [
+        report_type,
+        file_format,
+        conference.id,
+        conference.updated_at,
+        conference.attendee_count,
+        snapshot.get('updated_at') if snapshot else None
+    ]
+    if report_type == 'attendees':
+        # Rows show users' names and emails, which change without touching the conference
+        parts.extend(attendees_version(attendee_ids(conference.id)))
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def data_key(report_type, data):
+    """Hash of the report data, for caching renders of identical reports"""
+    stable = {field: value for field, value in data.items() if field not in VOLATILE_FIELDS}
+    payload = json.dumps([report_type, stable], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def artifact_path(key, file_format):
+    return os.path.join(ARTIFACT_DIR, f'{key}.{file_format}')
+
+
+def pdf_artifact(report_type, data, timeout=PDF_RENDER_TIMEOUT):
+    """
+    Path of the PDF for a report, rendering it in the pool unless already cached.
+
+    Concurrent requests for the same data share one render. Returns None when
+    rendering takes longer than timeout; it carries on and a retry finds the file.
+    """
+    key = data_key(report_type, data)
+    path = artifact_path(key, 'pdf')
+    if os.path.exists(path):
+        return path
+
+    with _rendering_lock:
+        future = _rendering.get(key)
+        if future is None:
+            future = _pool_submit(write_pdf, report_type, data, path)
+            _rendering[key] = future
+            future.add_done_callback(lambda done: _rendering.pop(key, None))
+
+    try:
+        future.result(timeout=timeout)
+    except TimeoutError:
+        return None
+    return path
+
+
+def submit_report(report_type, file_format, conference, user_id):
+    """
+    Create a job for a report, reusing work where possible.
+
+    Returns a finished job straight away when the artifact is already on disk,
+    and the in-flight job when the same report is already queued or running.
+    """
+    key = content_key(report_type, file_format, conference)
+
+    pending = MongoReportJob.objects(content_key=key, status__in=['queued', 'running']).first()
+    if pending:
+        return pending
+
+    job = MongoReportJob(
+        report_type=report_type,
+        format=file_format,
+        conference_id=conference.id,
+        requested_by=user_id,
+        content_key=key,
+        download_name=f'{conference.name}_{report_type}_{datetime.utcnow().strftime("%Y%m%d")}.{file_format}'
+    )
+
+    if os.path.exists(artifact_path(key, file_format)):
+        job.status = 'done'
+        job.finished_at = datetime.utcnow()
+        job.save()
+        return job
+
+    job.save()
+    _submit(job.id)
+    return job
+
+
+def recover(job):
+    """Resubmit jobs lost to a restarted or crashed worker; called when a job is polled"""
+    now = datetime.utcnow()
+    if job.status == 'queued' and now - job.created_at > REQUEUE_AFTER:
+        _submit(job.id)
+    elif job.status == 'running' and job.started_at and now - job.started_at > JOB_TIMEOUT:
+        reclaimed = MongoReportJob.objects(id=job.id, status='running', started_at=job.started_at).update_one(
+            set__status='queued'
+        )
+        if reclaimed:
+            _submit(job.id)
+
+
+def _submit(job_id):
+    _pool_submit(run_job, job_id)
+
+
+def _pool_submit(fn, *args):
+    # A pool whose child died (e.g. killed for memory) is unusable; replace it once
+    global _executor
+    try:
+        return _get_executor().submit(fn, *args)
+    except BrokenProcessPool:
+        with _executor_lock:
+            _executor = None
+        return _get_executor().submit(fn, *args)
+
+
+def _get_executor():
+    # Created lazily so each forked gunicorn worker owns its pool; spawned
+    # children open their own MongoDB connection in _init_worker
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=REPORT_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+        return _executor
+
+
+def _init_worker():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    from config.database import init_db
+    try:
+        init_db(None)
+    except Exception as e:
+        # PDF renders receive their data and still work without a connection
+        print(f"[ERROR] Report worker could not connect to MongoDB: {e}")
+
+
+def run_job(job_id):
+    """Execute one job (in a pool process). The queued -> running claim makes reruns harmless"""
+    jobs = MongoReportJob._get_collection()
+    job = jobs.find_one_and_update(
+        {'_id': job_id, 'status': 'queued'},
+        {'$set': {'status': 'running', 'started_at': datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not job:
+        return
+
+    try:
+        path = artifact_path(job['content_key'], job['format'])
+        if not os.path.exists(path):
+            conference = MongoConference.objects(id=job['conference_id']).exclude('attendees').first()
+            if not conference:
+                raise ValueError('Conference not found')
+            write_artifact(job['report_type'], job['format'], conference, path)
+
+        jobs.update_one({'_id': job_id}, {'$set': {'status': 'done', 'finished_at': datetime.utcnow()}})
+        print(f"[OK] Report job finished: {job_id}")
+    except Exception as e:
+        jobs.update_one(
+            {'_id': job_id},
+            {'$set': {'status': 'failed', 'error': str(e), 'finished_at': datetime.utcnow()}}
+        )
+        print(f"Report job {job_id} failed: {e}")
+
+
+def build_report(report_type, conference, lazy=False):
+    if report_type == 'attendees':
+        return attendees_report_data(conference, lazy=lazy)
+    if report_type == 'sessions':
+        return sessions_report_data(conference)
+    return conference_report_data(conference)
+
+
+def write_artifact(report_type, file_format, conference, path):
+    """Render a report to path"""
+    if file_format == 'csv':
+        data = build_report(report_type, conference, lazy=True)
+        _write_file(path, csv_stream(CSV_ROWS[report_type](data)))
+    elif file_format == 'pdf':
+        write_pdf(report_type, build_report(report_type, conference), path)
+    else:
+        data = build_report(report_type, conference)
+        _write_file(path, [json.dumps(data, default=str).encode()])
+
+
+def write_pdf(report_type, data, path):
+    """Render report data as a PDF (in a pool process)"""
+    _write_file(path, [render_pdf(CSV_ROWS[report_type](data))])
+
+
+def _write_file(path, chunks):
+    # Written to a temp file first so readers never see a partial file
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    _prune_artifacts()
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as output:
+            for chunk in chunks:
+                output.write(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _prune_artifacts():
+    cutoff = time.time() - ARTIFACT_MAX_AGE
+    for name in os.listdir(ARTIFACT_DIR):
+        path = os.path.join(ARTIFACT_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,180 @@
+"""
+Report assembly shared by the report routes and background report jobs
+"""
+from datetime import datetime
+from models.MongoConference import MongoConference
+from models.MongoUser import MongoUser
+from models.MongoConferenceReport import MongoConferenceReport
+
+# Attendee rows are resolved with one $in query per chunk of user ids
+ATTENDEE_CHUNK_SIZE = 500
+ATTENDEE_FIELDS = {'full_name': 1, 'email': 1, 'username': 1, 'created_at': 1}
+
+
+def attendee_ids(conference_id):
+    """The conference's attendee ids (cached conferences omit the array)"""
+    conference = MongoConference.objects(id=conference_id).only('attendees').first()
+    return conference.attendees if conference else []
+
+
+def iter_attendees(attendee_ids, chunk_size=ATTENDEE_CHUNK_SIZE):
+    """Yield report rows for the given user ids, in order, with one $in query per chunk"""
+    users = MongoUser._get_collection()
+    for start in range(0, len(attendee_ids), chunk_size):
+        chunk = attendee_ids[start:start + chunk_size]
+        # One batch per chunk; the default first batch (101 docs) would need a getMore
+        found = {
+            user['_id']: user
+            for user in users.find({'_id': {'$in': chunk}}, ATTENDEE_FIELDS, batch_size=len(chunk))
+        }
+        for attendee_id in chunk:
+            user = found.get(attendee_id)
+            if user:
+                created_at = user.get('created_at')
+                yield {
+                    'name': user.get('full_name'),
+                    'email': user.get('email'),
+                    'username': user.get('username'),
+                    'joined_date': created_at.isoformat() if created_at else ''
+                }
+
+
+def attendees_version(attendee_ids):
+    """(users found, latest updated_at) for the given user ids, from one $in aggregation on _id"""
+    if not attendee_ids:
+        return 0, None
+    pipeline = [
+        {'$match': {'_id': {'$in': list(attendee_ids)}}},
+        {'$group': {'_id': None, 'count': {'$sum': 1}, 'updated_at': {'$max': '$updated_at'}}}
+    ]
+    for doc in MongoUser._get_collection().aggregate(pipeline):
+        return doc['count'], doc['updated_at']
+    return 0, None
+
+
+def conference_report_data(conference, refresh=False):
+    """Conference report from the materialized snapshot"""
+    summary = MongoConferenceReport.summary(conference.id, refresh=refresh)
+    return {
+        'conference_name': conference.name,
+        'conference_id': conference.id,
+        'description': conference.description,
+        'location': conference.location,
+        'start_date': conference.start_date.isoformat(),
+        'end_date': conference.end_date.isoformat(),
+        'total_sessions': summary['total_sessions'],
+        'total_attendees': conference.attendee_count,
+        'max_attendees': conference.max_attendees,
+        'fill_rate': round(conference.attendee_count / conference.max_attendees, 4) if conference.max_attendees else 0,
+        'session_registrations': summary['session_registrations'],
+        'session_capacity': summary['session_capacity'],
+        'session_fill_rate': summary['session_fill_rate'],
+        'registration_fee': conference.registration_fee,
+        'status': conference.status,
+        'sessions': summary['sessions'],
+        'snapshot_at': summary['snapshot_at'],
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
+def sessions_report_data(conference, refresh=False):
+    """Per-session registration report from the materialized snapshot"""
+    summary = MongoConferenceReport.summary(conference.id, refresh=refresh)
+
+    sessions_data = []
+    for sess in summary['sessions']:
+        sessions_data.append({
+            'title': sess['title'],
+            'speaker': sess['speaker'],
+            'location': sess['location'],
+            'start_time': sess['start_time'],
+            'end_time': sess['end_time'],
+            'registered_attendees': sess['attendee_count'],
+            'capacity': sess['capacity']
+        })
+
+    return {
+        'conference_name': conference.name,
+        'total_sessions': len(sessions_data),
+        'sessions': sessions_data,
+        'snapshot_at': summary['snapshot_at'],
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
+def attendees_report_data(conference, lazy=False):
+    """Attendee report; with lazy=True 'attendees' is a generator for streaming"""
+    ids = attendee_ids(conference.id)
+    attendees = iter_attendees(ids)
+    if not lazy:
+        attendees = list(attendees)
+    return {
+        'conference_name': conference.name,
+        'total_attendees': len(ids) if lazy else len(attendees),
+        'attendees': attendees,
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
+def conference_csv_rows(data):
+    """CSV rows for a conference report"""
+    # Write header
+    yield ['Conference Report']
+    yield ['Generated at', datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')]
+    yield []
+
+    # Write conference details
+    yield ['Conference Name', data.get('conference_name', '')]
+    yield ['Total Sessions', data.get('total_sessions', 0)]
+    yield ['Total Attendees', data.get('total_attendees', 0)]
+    yield []
+
+    # Write sessions if available
+    if data.get('sessions') is not None:
+        yield ['Sessions']
+        yield ['Title', 'Speaker', 'Location', 'Start Time', 'End Time']
+        for session in data['sessions']:
+            yield [
+                session.get('title', ''),
+                session.get('speaker', ''),
+                session.get('location', ''),
+                session.get('start_time', ''),
+                session.get('end_time', '')
+            ]
+
+
+def sessions_csv_rows(report):
+    """CSV rows for a sessions report"""
+    yield ['Sessions Report']
+    yield ['Conference', report.get('conference_name', '')]
+    yield ['Total Sessions', report.get('total_sessions', 0)]
+    yield []
+    yield ['Title', 'Speaker', 'Location', 'Start Time', 'End Time', 'Registered', 'Capacity']
+
+    for sess in report.get('sessions', []):
+        yield [
+            sess.get('title', ''),
+            sess.get('speaker', ''),
+            sess.get('location', ''),
+            sess.get('start_time', ''),
+            sess.get('end_time', ''),
+            sess.get('registered_attendees', 0),
+            sess.get('capacity', 0)
+        ]
+
+
+def attendees_csv_rows(report):
+    """CSV rows for an attendee report; report['attendees'] may be a generator"""
+    yield ['Attendees Report']
+    yield ['Conference', report.get('conference_name', '')]
+    yield ['Total Attendees', report.get('total_attendees', 0)]
+    yield []
+    yield ['Name', 'Email', 'Username', 'Joined Date']
+
+    for attendee in report.get('attendees', []):
+        yield [
+            attendee.get('name', ''),
+            attendee.get('email', ''),
+            attendee.get('username', ''),
+            attendee.get('joined_date', '')
+        ]
@@ -0,0 +1,209 @@
+"""
+Room booking conflicts
+
+Each (conference, location) pair gets an interval index of its sessions,
+sorted by start time, built lazily from one indexed query and kept in a
+per-worker cache. Writes in this worker update the index in place; the TTL
+bounds how long another worker's bookings can go unseen by the index.
+
+A hit in the index is enough to refuse a booking. A miss is confirmed with
+one query on the (conference_id, location, start_time) index before the
+write, and the check and the write run under a per-room lock (see booking),
+so neither another worker's bookings nor a concurrent request thread can
+slip past the check.
+"""
+import bisect
+import os
+import threading
+from contextlib import contextmanager
+from datetime import timezone
+from utils.cache import TTLCache
+
+_schedules = TTLCache(
+    'room_schedule',
+    maxsize=int(os.getenv('ROOM_SCHEDULE_CACHE_SIZE', 2048)),
+    ttl=float(os.getenv('ROOM_SCHEDULE_CACHE_TTL', 60))
+)
+
+# Striped so rooms share a fixed set of locks instead of one lock per room
+_booking_locks = [threading.Lock() for _ in range(64)]
+
+_FIELDS = {'title': 1, 'location': 1, 'start_time': 1, 'end_time': 1}
+
+
+def _utc(value):
+    """Stored times are naive UTC; aware inputs are converted so they compare"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class IntervalIndex:
+    """
+    Sessions sorted by start time: one room's bookings, or one user's agenda.
+
+    max_end[i] is the latest end among the first i + 1 sessions, so a lookup
+    bisects to the last session starting before the new end and walks back
+    only while an earlier session can still reach past the new start.
+    Cached indexes are shared by a worker's request threads, hence the lock.
+    """
+
+    def __init__(self, sessions=()):
+        self._lock = threading.Lock()
+        self._starts = []
+        self._entries = []
+        self._max_end = []
+        for entry in sorted(sessions, key=lambda entry: entry['start_time']):
+            self._starts.append(entry['start_time'])
+            self._entries.append(entry)
+        self._reindex(0)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def copy(self):
+        clone = IntervalIndex()
+        with self._lock:
+            clone._starts = list(self._starts)
+            clone._entries = list(self._entries)
+            clone._max_end = list(self._max_end)
+        return clone
+
+    def _reindex(self, start):
+        del self._max_end[start:]
+        latest = self._max_end[-1] if self._max_end else None
+        for entry in self._entries[start:]:
+            latest = entry['end_time'] if latest is None else max(latest, entry['end_time'])
+            self._max_end.append(latest)
+
+    def conflicts(self, start_time, end_time, exclude_id=None):
+        """Sessions overlapping [start_time, end_time), earliest first"""
+        start_time, end_time = _utc(start_time), _utc(end_time)
+        found = []
+        with self._lock:
+            index = bisect.bisect_left(self._starts, end_time) - 1
+            while index >= 0 and self._max_end[index] > start_time:
+                entry = self._entries[index]
+                if entry['end_time'] > start_time and entry['id'] != exclude_id:
+                    found.append(entry)
+                index -= 1
+        found.reverse()
+        return found
+
+    def add(self, entry):
+        entry = dict(entry, start_time=_utc(entry['start_time']), end_time=_utc(entry['end_time']))
+        with self._lock:
+            self._remove(entry['id'])
+            index = bisect.bisect_right(self._starts, entry['start_time'])
+            self._starts.insert(index, entry['start_time'])
+            self._entries.insert(index, entry)
+            self._reindex(index)
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._remove(session_id)
+
+    def _remove(self, session_id):
+        for index, entry in enumerate(self._entries):
+            if entry['id'] == session_id:
+                del self._starts[index]
+                del self._entries[index]
+                self._reindex(index)
+                return True
+        return False
+
+
+def entry_for(doc):
+    """Index entry from a MongoSession or a raw session document"""
+    get = doc.get if isinstance(doc, dict) else lambda field: getattr(doc, field, None)
+    return {
+        'id': get('_id') if isinstance(doc, dict) else doc.id,
+        'title': get('title'),
+        'location': get('location'),
+        'start_time': _utc(get('start_time')),
+        'end_time': _utc(get('end_time'))
+    }
+
+
+def _sessions():
+    # Imported here: the session model is bound to the database at startup
+    from models.MongoSession import MongoSession
+    return MongoSession._get_collection()
+
+
+def schedule_for(conference_id, location, fresh=False):
+    """The cached interval index for a room, loaded on first use (or reloaded when fresh)"""
+    key = (conference_id, location)
+    schedule = None if fresh else _schedules.get(key)
+    if schedule is None:
+        cursor = _sessions().find(
+            {'conference_id': conference_id, 'location': location}, _FIELDS
+        ).sort('start_time', 1)
+        schedule = IntervalIndex(entry_for(doc) for doc in cursor)
+        _schedules.set(key, schedule)
+    return schedule
+
+
+@contextmanager
+def booking(conference_id, location):
+    """Hold while checking for conflicts and saving, so this worker's threads book a room one at a time"""
+    with _booking_locks[hash((conference_id, location)) % len(_booking_locks)]:
+        yield
+
+
+def find_conflicts(conference_id, location, start_time, end_time, exclude_id=None):
+    """
+    Sessions already booked into the location that overlap the given times.
+
+    The cached index answers hits; a miss is confirmed against the database,
+    and any sessions found there are loaded into a fresh index.
+    """
+    conflicts = schedule_for(conference_id, location).conflicts(start_time, end_time, exclude_id)
+    if conflicts:
+        return conflicts
+    query = {
+        'conference_id': conference_id,
+        'location': location,
+        'start_time': {'$lt': _utc(end_time)},
+        'end_time': {'$gt': _utc(start_time)}
+    }
+    if exclude_id is not None:
+        query['_id'] = {'$ne': exclude_id}
+    conflicts = [entry_for(doc) for doc in _sessions().find(query, _FIELDS).sort('start_time', 1)]
+    if conflicts:
+        # The cached index missed another worker's booking
+        invalidate(conference_id, location)
+    return conflicts
+
+
+def session_saved(sess, previous_location=None):
+    """Record a created or edited session in this worker's room indexes"""
+    if previous_location is not None and previous_location != sess.location:
+        session_removed(sess.conference_id, previous_location, sess.id)
+    schedule = _schedules.get((sess.conference_id, sess.location))
+    if schedule is not None:
+        schedule.add(entry_for(sess))
+
+
+def session_removed(conference_id, location, session_id):
+    schedule = _schedules.get((conference_id, location))
+    if schedule is not None:
+        schedule.remove(session_id)
+
+
+def invalidate(conference_id, location):
+    """Drop a room index so the next lookup reloads it"""
+    _schedules.invalidate((conference_id, location))
+
+
+def serialize_conflicts(conflicts):
+    return [
+        {
+            'id': entry['id'],
+            'title': entry['title'],
+            'location': entry['location'],
+            'start_time': entry['start_time'].isoformat(),
+            'end_time': entry['end_time'].isoformat()
+        }
+        for entry in conflicts
+    ]
@@ -0,0 +1,101 @@
+"""
+Streaming response helpers
+"""
+import csv
+import json
+import unicodedata
+import zlib
+from datetime import datetime
+from urllib.parse import quote
+from flask import Response
+
+CSV_CHUNK_ROWS = 500
+NDJSON_CHUNK_ROWS = 500
+GZIP_LEVEL = 6
+
+
+class _LineBuffer:
+    """File-like sink that hands csv.writer output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_cell(value):
+    """Format a value for CSV output (datetimes as ISO 8601)"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def csv_stream(rows, chunk_rows=CSV_CHUNK_ROWS):
+    """Encode an iterable of rows as CSV, yielding a chunk every chunk_rows rows"""
+    writer = csv.writer(_LineBuffer())
+    buffer = []
+    for row in rows:
+        buffer.append(writer.writerow([csv_cell(value) for value in row]))
+        if len(buffer) >= chunk_rows:
+            yield ''.join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def ndjson_stream(docs, chunk_rows=NDJSON_CHUNK_ROWS):
+    """Encode an iterable of documents as newline-delimited JSON, one chunk every chunk_rows docs"""
+    buffer = []
+    for doc in docs:
+        buffer.append(json.dumps(doc, default=_json_default, separators=(',', ':')))
+        if len(buffer) >= chunk_rows:
+            yield ('\n'.join(buffer) + '\n').encode()
+            buffer = []
+    if buffer:
+        yield ('\n'.join(buffer) + '\n').encode()
+
+
+def gzip_stream(chunks, level=GZIP_LEVEL):
+    """
+    Gzip a byte stream on the fly.
+
+    Each input chunk is sync-flushed, so a client that loses the connection can
+    still decompress everything received up to the last complete chunk.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def guarded_stream(chunks):
+    """Log and end a response stream that fails midway (headers are already sent)"""
+    try:
+        yield from chunks
+    except Exception as e:
+        print(f"Streaming error: {str(e)}")
+
+
+def set_attachment(response, download_name):
+    """Content-Disposition for a download, RFC 2231-encoded when not ASCII (as send_file does)"""
+    try:
+        download_name.encode('ascii')
+        response.headers.set('Content-Disposition', 'attachment', filename=download_name)
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', download_name).encode('ascii', 'ignore').decode('ascii')
+        response.headers.set(
+            'Content-Disposition', 'attachment',
+            filename=simple, **{'filename*': f"UTF-8''{quote(download_name, safe='')}"}
+        )
+    return response
+
+
+def csv_attachment(rows, download_name):
+    """Chunked text/csv download; rows are produced lazily while the response is sent"""
+    return set_attachment(Response(guarded_stream(csv_stream(rows)), mimetype='text/csv'), download_name)
@@ -0,0 +1,102 @@
+"""
+Login and signup throttling shared by every worker on the node
+
+Token buckets live in a small SQLite file, so all gunicorn workers (and
+threads) draw from the same buckets. A check is one short write transaction
+on a local file: rejected attempts are turned away before any user lookup
+or password hash. Attempts that succeed give their token back (refund), so
+per-IP buckets only count failures and a venue behind one NAT address can
+still log everyone in.
+
+If the store is unavailable the check lets the request through; throttling
+must never lock everyone out.
+"""
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+THROTTLE_DB = os.getenv('THROTTLE_DB', os.path.join(tempfile.gettempdir(), 'conference_throttle.sqlite3'))
+
+# (burst, seconds to refill the full burst) per rule
+RULES = {
+    'login_user': (int(os.getenv('LOGIN_USER_BURST', 5)), float(os.getenv('LOGIN_USER_WINDOW', 300))),
+    'login_ip': (int(os.getenv('LOGIN_IP_BURST', 30)), float(os.getenv('LOGIN_IP_WINDOW', 300))),
+    'signup_ip': (int(os.getenv('SIGNUP_IP_BURST', 5)), float(os.getenv('SIGNUP_IP_WINDOW', 3600)))
+}
+
+# Buckets untouched for this long are full again and can be dropped
+_PRUNE_AFTER = max(window for _, window in RULES.values())
+_PRUNE_CHANCE = 0.001
+
+_local = threading.local()
+
+
+def _connection():
+    # One connection per thread and process; sqlite3 connections must not cross a fork
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = sqlite3.connect(THROTTLE_DB, timeout=1, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def hit(rule, key):
+    """
+    Take one token from the bucket for (rule, key).
+
+    Returns 0 when allowed, else the seconds until a token is available.
+    """
+    burst, window = RULES[rule]
+    rate = burst / window
+    bucket = f'{rule}:{key}'
+    now = time.time()
+    try:
+        conn = _connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (bucket,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            if tokens < 1:
+                conn.execute('ROLLBACK')
+                return (1 - tokens) / rate
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (bucket, tokens - 1, now)
+            )
+            if random.random() < _PRUNE_CHANCE:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - _PRUNE_AFTER,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+    except sqlite3.Error as e:
+        print(f"Throttle store error: {e}")
+    return 0
+
+
+def refund(rule, key):
+    """Give back the token taken by hit(), e.g. after a successful login"""
+    burst, _ = RULES[rule]
+    try:
+        _connection().execute(
+            'UPDATE buckets SET tokens = MIN(?, tokens + 1) WHERE key = ?', (burst, f'{rule}:{key}')
+        )
+    except sqlite3.Error as e:
+        print(f"Throttle store error: {e}")
+
+
+def reset(rule, key):
+    """Refill a bucket, e.g. a username's after a successful login"""
+    try:
+        _connection().execute('DELETE FROM buckets WHERE key = ?', (f'{rule}:{key}',))
+    except sqlite3.Error as e:
+        print(f"Throttle store error: {e}")
@@ -0,0 +1,50 @@
+"""
+Background waitlist promotion
+
+Capacity increases can free many seats at once. Rather than promoting inside
+the edit request, the session id is queued here and a daemon thread in the
+worker drains the queue, filling every free seat from the head of the waitlist.
+"""
+import queue
+import threading
+
+_pending = queue.Queue()
+_queued = set()
+_lock = threading.Lock()
+_thread = None
+
+
+def schedule_promotion(session_id):
+    """Queue a session for a batch promotion sweep (deduplicated while pending)"""
+    _ensure_started()
+    with _lock:
+        if session_id in _queued:
+            return
+        _queued.add(session_id)
+    _pending.put(session_id)
+
+
+def _ensure_started():
+    # Started lazily so each forked gunicorn worker gets its own thread
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name='waitlist-sweeper', daemon=True)
+            _thread.start()
+
+
+def _run():
+    from models.MongoWaitlistEntry import MongoWaitlistEntry
+
+    while True:
+        session_id = _pending.get()
+        with _lock:
+            _queued.discard(session_id)
+        try:
+            promoted = MongoWaitlistEntry.promote(session_id)
+            if promoted:
+                print(f"[OK] Promoted {len(promoted)} waitlisted user(s) for session {session_id}")
+        except Exception as e:
+            print(f"Waitlist sweep error for session {session_id}: {e}")
+        finally:
+            _pending.task_done()